@@ -34,45 +34,648 @@ options:
             - name: ANSIBLE_MORPHEUS_TOKEN
         vars:
             - name: ansible_morpheus_token
+    morpheus_api_token_validation:
+        description:
+            - When to validate O(morpheus_api_token).
+            - V(eager) - Validate the token against the whoami endpoint at login.
+            - V(lazy) - Trust the token until a request is rejected with a 401 error, saving a request per connection.
+        type: str
+        choices:
+            - eager
+            - lazy
+        default: eager
+        env:
+            - name: ANSIBLE_MORPHEUS_API_TOKEN_VALIDATION
+        vars:
+            - name: ansible_morpheus_api_token_validation
+        version_added: 0.8.0
+    morpheus_retry_attempts:
+        description:
+            - Maximum number of attempts made for a request that fails with a retryable status code,
+              or because the connection was reset.
+            - Set to V(1) to disable retries.
+        type: int
+        default: 3
+        env:
+            - name: ANSIBLE_MORPHEUS_RETRY_ATTEMPTS
+        vars:
+            - name: ansible_morpheus_retry_attempts
+        version_added: 0.8.0
+    morpheus_retry_backoff:
+        description:
+            - Base number of seconds to wait between attempts, doubled after each failed attempt.
+        type: float
+        default: 1.0
+        env:
+            - name: ANSIBLE_MORPHEUS_RETRY_BACKOFF
+        vars:
+            - name: ansible_morpheus_retry_backoff
+        version_added: 0.8.0
+    morpheus_retry_jitter:
+        description:
+            - Randomise the wait between attempts, between zero and the backoff period,
+              to avoid many connections retrying in lockstep.
+        type: bool
+        default: true
+        env:
+            - name: ANSIBLE_MORPHEUS_RETRY_JITTER
+        vars:
+            - name: ansible_morpheus_retry_jitter
+        version_added: 0.8.0
+    morpheus_retry_status_codes:
+        description:
+            - HTTP status codes that will be retried.
+        type: list
+        elements: int
+        default: [502, 503, 504]
+        env:
+            - name: ANSIBLE_MORPHEUS_RETRY_STATUS_CODES
+        vars:
+            - name: ansible_morpheus_retry_status_codes
+        version_added: 0.8.0
+    morpheus_retry_methods:
+        description:
+            - HTTP methods that will be retried.
+            - Only idempotent methods are retried by default, as Morpheus uses C(PUT) for some actions
+              that are not safe to repeat, such as creating snapshots.
+        type: list
+        elements: str
+        default: [GET, HEAD, OPTIONS]
+        env:
+            - name: ANSIBLE_MORPHEUS_RETRY_METHODS
+        vars:
+            - name: ansible_morpheus_retry_methods
+        version_added: 0.8.0
+    morpheus_rate_limit:
+        description:
+            - Maximum number of requests per second sent to the appliance by the connection.
+            - Set to V(0) for no limit.
+        type: float
+        default: 0
+        env:
+            - name: ANSIBLE_MORPHEUS_RATE_LIMIT
+        vars:
+            - name: ansible_morpheus_rate_limit
+        version_added: 0.8.0
+    morpheus_max_in_flight:
+        description:
+            - Maximum number of requests the connection will have in progress at the same time.
+            - Set to V(0) for no limit.
+        type: int
+        default: 0
+        env:
+            - name: ANSIBLE_MORPHEUS_MAX_IN_FLIGHT
+        vars:
+            - name: ansible_morpheus_max_in_flight
+        version_added: 0.8.0
+    morpheus_page_size:
+        description:
+            - Number of items requested in each page of the list requests made by modules.
+            - Set to V(0) to request all items of a list with a single request.
+        type: int
+        default: 1000
+        env:
+            - name: ANSIBLE_MORPHEUS_PAGE_SIZE
+        vars:
+            - name: ansible_morpheus_page_size
+        version_added: 0.8.0
+    morpheus_cache:
+        description:
+            - Cache responses to C(GET) requests for the lifetime of the connection.
+            - Responses with an C(ETag) or C(Last-Modified) header are revalidated with the appliance
+              on each request, and the cached response is used when the appliance responds with C(304 Not Modified).
+            - The cache is cleared whenever a request that may modify data, such as C(POST), C(PUT) or C(DELETE), is sent.
+            - At most 16 MiB of response bodies are cached, the least recently used responses are discarded first.
+        type: bool
+        default: true
+        env:
+            - name: ANSIBLE_MORPHEUS_CACHE
+        vars:
+            - name: ansible_morpheus_cache
+        version_added: 0.8.0
+    morpheus_cache_ttl:
+        description:
+            - Number of seconds a cached response without an C(ETag) or C(Last-Modified) header is reused for,
+              without sending the request to the appliance.
+            - Changes made to the appliance outside of the connection may not be seen for up to this many seconds.
+            - Set to V(0) to only cache responses that can be revalidated.
+        type: float
+        default: 0
+        env:
+            - name: ANSIBLE_MORPHEUS_CACHE_TTL
+        vars:
+            - name: ansible_morpheus_cache_ttl
+        version_added: 0.8.0
+    morpheus_name_index_ttl:
+        description:
+            - Number of seconds an index of objects by name, built with a single list request per endpoint,
+              is used to look up objects by name, instead of querying the appliance for each lookup.
+            - The index is kept up to date with objects created, updated and deleted through the connection,
+              names not found in the index are always looked up on the appliance, but objects changed
+              or deleted outside of the connection may not be seen for up to this many seconds.
+            - Set to V(0) to disable the index.
+        type: float
+        default: 0
+        env:
+            - name: ANSIBLE_MORPHEUS_NAME_INDEX_TTL
+        vars:
+            - name: ansible_morpheus_name_index_ttl
+        version_added: 0.8.0
+    morpheus_token_cache:
+        description:
+            - Cache access tokens on disk so they can be reused by other persistent connections and playbook runs
+              targeting the same appliance and user, instead of logging in again.
+            - When using O(morpheus_api_token), a successful validation of the token is cached instead.
+            - Cache files are only readable by the current user, but are not encrypted.
+        type: bool
+        default: false
+        env:
+            - name: ANSIBLE_MORPHEUS_TOKEN_CACHE
+        vars:
+            - name: ansible_morpheus_token_cache
+        version_added: 0.8.0
+    morpheus_token_cache_path:
+        description:
+            - Directory to store cached access tokens in when O(morpheus_token_cache=true).
+        type: path
+        default: ~/.ansible/morpheus_token_cache
+        env:
+            - name: ANSIBLE_MORPHEUS_TOKEN_CACHE_PATH
+        vars:
+            - name: ansible_morpheus_token_cache_path
+        version_added: 0.8.0
 '''
 
 from ansible.module_utils.basic import to_text
-from ansible.errors import AnsibleConnectionFailure, AnsibleOptionsError, AnsibleAuthenticationFailure, AnsibleError
+from ansible.errors import AnsibleConnectionFailure, AnsibleOptionsError, AnsibleAuthenticationFailure
 from ansible.module_utils.six.moves.urllib.error import HTTPError
 from ansible.plugins.httpapi import HttpApiBase
 from ansible.module_utils.connection import ConnectionError
+from ansible_collections.morpheus.core.plugins.module_utils.morpheus_funcs import dict_filter
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from functools import partial
+from hashlib import sha256
+from http.client import HTTPException
+from io import BytesIO
+import binascii
 import json
+import mimetypes
+import os
+import random
 import re
+import tempfile
+import threading
+import time
+import zlib
 
-try:
-    from urllib3 import encode_multipart_formdata
-    from urllib3.fields import RequestField
-except (ImportError, ModuleNotFoundError) as imp_exc:
-    URLLIB3_IMPORT_ERROR = imp_exc
-else:
-    URLLIB3_IMPORT_ERROR = None
-
+OAUTH_PATH = '/oauth/token'
 LOGIN_PATH = '/oauth/token?client_id=morph-api&grant_type=password&scope=write'
+REFRESH_PATH = '/oauth/token?client_id=morph-api&grant_type=refresh_token&scope=write'
 WHOAMI_PATH = '/api/whoami'
 
+# Upper bound on the number of requests sent concurrently by send_requests
+MAX_WORKERS = 16
+
+# Size of the chunks file uploads are read from disk in
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Size of the chunks compressed responses are decompressed in
+DECOMPRESS_CHUNK_SIZE = 64 * 1024
+
+# Seconds before an access token expires that it will be refreshed
+TOKEN_REFRESH_MARGIN = 300
+
+# Maximum number of seconds to wait between retry attempts
+MAX_RETRY_BACKOFF = 60
+
+# Seconds a cached API token validation is trusted for
+TOKEN_CACHE_VALIDATION_TTL = 3600
+
+# Digests of API tokens already validated by this process
+VALIDATED_TOKENS = set()
+
+# Maximum number of responses held in the response cache
+CACHE_MAX_ENTRIES = 256
+
+# Maximum total size of the response bodies held in the response cache, the least
+# recently used responses are discarded to stay within it
+CACHE_MAX_SIZE = 16 * 1024 * 1024
+
+# Responses with a larger body are not cached
+CACHE_MAX_BODY_SIZE = 4 * 1024 * 1024
+
+# HTTP methods that do not modify data, all other methods clear the response cache
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+try:
+    import orjson
+except (ImportError, ModuleNotFoundError):
+    orjson = None
+
 BASE_HEADERS = {
     'Accept': 'application/json',
+    'Accept-Encoding': 'gzip, deflate',
     'Content-Type': 'application/json'
 }
 
+FORM_HEADERS = {
+    'Accept': 'application/json',
+    'Content-Type': 'application/x-www-form-urlencoded'
+}
+
+
+class RateLimiter():
+    """
+    A token bucket rate limiter, shared by all requests sent through a connection,
+    that also limits the number of requests in progress at the same time.
+    """
+    def __init__(self, rate: float, max_in_flight: int) -> None:
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+        self._in_flight = threading.BoundedSemaphore(max_in_flight) if max_in_flight > 0 else None
+
+    def pause(self, seconds: float) -> None:
+        """Stop sending requests for a number of seconds, e.g. when the appliance has asked us to slow down.
+
+        Args:
+            seconds (float): Number of seconds to pause for.
+        """
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def _take_token(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self.paused_until - now
+
+                if wait <= 0:
+                    if self.rate <= 0:
+                        return
+
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+
+                    wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+    @contextmanager
+    def request(self):
+        """Context manager to wrap sending a request, blocking until the request is permitted.
+        """
+        if self._in_flight is not None:
+            self._in_flight.acquire()
+
+        try:
+            self._take_token()
+            yield
+        finally:
+            if self._in_flight is not None:
+                self._in_flight.release()
+
+
+class ResponseCache():
+    """
+    A bounded, least recently used cache of response bodies keyed by request path,
+    holding the validators needed to revalidate each response with the appliance.
+    """
+    def __init__(self, ttl: float, max_entries: int = CACHE_MAX_ENTRIES, max_size: int = CACHE_MAX_SIZE) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    def get(self, path: str) -> dict:
+        """Get the cached entry for a path.
+
+        Args:
+            path (str): The request path, including any query string.
+
+        Returns:
+            dict: The cached entry, or None if the path is not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                self._entries.move_to_end(path)
+            return entry
+
+    def fresh(self, entry: dict) -> bool:
+        return entry is not None and entry['expires'] > time.monotonic()
+
+    def validators(self, entry: dict) -> dict:
+        """Conditional request headers to revalidate a cached entry with.
+        """
+        headers = {}
+
+        if entry.get('etag') is not None:
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified') is not None:
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        return headers
+
+    def _expires(self, headers) -> float:
+        cache_control = (headers.get('Cache-Control') or '').lower()
+
+        if 'no-cache' in cache_control:
+            return 0.0
+
+        max_age = re.search(r'max-age=(\d+)', cache_control)
+        ttl = int(max_age.group(1)) if max_age is not None else self.ttl
+
+        return time.monotonic() + ttl
+
+    def store(self, path: str, code: int, body: bytes, headers, generation: int = None) -> None:
+        """Cache a response, if it can be revalidated or reused.
+
+        Args:
+            path (str): The request path, including any query string.
+            code (int): The response status code.
+            body (bytes): The decompressed response body.
+            headers: The response headers.
+            generation (int, optional): The cache generation when the request was sent, the response is not
+             cached if the cache has since been cleared, as it may predate a modification. Defaults to None.
+        """
+        if 'no-store' in (headers.get('Cache-Control') or '').lower() or len(body) > min(CACHE_MAX_BODY_SIZE, self.max_size):
+            self.discard(path)
+            return
+
+        entry = {
+            'code': code,
+            'body': body,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'expires': self._expires(headers)
+        }
+
+        if entry['etag'] is None and entry['last_modified'] is None and not self.fresh(entry):
+            self.discard(path)
+            return
+
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+
+            self._put(path, entry)
+
+    def revalidated(self, path: str, entry: dict, headers, generation: int = None) -> None:
+        """Update a cached entry after the appliance has responded with 304 Not Modified.
+        """
+        entry['expires'] = self._expires(headers)
+        entry['etag'] = headers.get('ETag') or entry['etag']
+
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+
+            self._put(path, entry)
+
+    def _put(self, path: str, entry: dict) -> None:
+        # Must be called holding the lock
+        previous = self._entries.pop(path, None)
+        if previous is not None:
+            self.size -= len(previous['body'])
+
+        self._entries[path] = entry
+        self.size += len(entry['body'])
+
+        while len(self._entries) > self.max_entries or self.size > self.max_size:
+            evicted = self._entries.popitem(last=False)[1]
+            self.size -= len(evicted['body'])
+
+    def discard(self, path: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            if entry is not None:
+                self.size -= len(entry['body'])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            self.generation += 1
+
+
+class UploadTimeoutError(AnsibleConnectionFailure):
+    """
+    Raised when an upload cannot finish before the persistent command timeout, at which
+    point ansible-connection would abandon the request.
+    """
+
+
+class FileStream():
+    """
+    A file-like request body that reads a file from disk in fixed size chunks as the body is sent,
+    reporting progress as each tenth of the file is read.
+    """
+    def __init__(self, file_path: str, chunk_size: int = UPLOAD_CHUNK_SIZE, progress=None) -> None:
+        self.file_path = file_path
+        self.content_length = os.path.getsize(file_path)
+        self.bytes_read = 0
+        self._progress = progress
+        self._next_report = self.content_length // 10
+        self._file = open(file_path, 'rb', buffering=chunk_size)
+
+    def read(self, size: int = -1) -> bytes:
+        """Read the next part of the file.
+
+        Args:
+            size (int, optional): Maximum number of bytes to read, if negative read the remaining file. Defaults to -1.
+
+        Returns:
+            bytes: The next part of the file, an empty bytes object once the file has been read.
+        """
+        data = self._file.read(size)
+        self.bytes_read += len(data)
+
+        if self._progress is not None and (self.bytes_read >= self._next_report or len(data) == 0):
+            self._progress(self.file_path, self.bytes_read, self.content_length)
+            self._next_report = self.bytes_read + max(1, self.content_length // 10)
+
+        return data
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class MultipartStream():
+    """
+    A file-like multipart/form-data request body, that reads files from disk in fixed size chunks
+    as the body is sent, so memory use does not depend on the size of the files.
+    """
+    def __init__(self, file_data: list[dict], chunk_size: int = UPLOAD_CHUNK_SIZE) -> None:
+        self.boundary = binascii.hexlify(os.urandom(16)).decode('ascii')
+        self.content_type = 'multipart/form-data; boundary={0}'.format(self.boundary)
+        self.chunk_size = chunk_size
+        self._parts = []
+
+        for item in file_data:
+            filename = os.path.basename(item['file_path'])
+            part_content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            part_header = '--{0}\r\nContent-Disposition: form-data; name="{1}"; filename="{2}"\r\nContent-Type: {3}\r\n\r\n'.format(
+                self.boundary, item['name'], filename, part_content_type
+            )
+            self._parts += [part_header.encode('utf-8'), item['file_path'], b'\r\n']
+
+        self._parts.append('--{0}--\r\n'.format(self.boundary).encode('ascii'))
+
+        self.content_length = sum(
+            len(part) if isinstance(part, bytes) else os.path.getsize(part)
+            for part in self._parts
+        )
+
+        self._chunks = self._generate_chunks()
+        self._chunk = b''
+        self._offset = 0
+
+    def _generate_chunks(self):
+        for part in self._parts:
+            if isinstance(part, bytes):
+                yield part
+                continue
+
+            with open(part, 'rb') as file_item:
+                while True:
+                    chunk = file_item.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+
+    def read(self, size: int = -1) -> bytes:
+        """Read the next part of the request body.
+
+        Args:
+            size (int, optional): Maximum number of bytes to read, if negative read the remaining body. Defaults to -1.
+
+        Returns:
+            bytes: The next part of the body, an empty bytes object once the body has been read.
+        """
+        data = []
+        remaining = size
+
+        while size < 0 or remaining > 0:
+            if self._offset >= len(self._chunk):
+                try:
+                    self._chunk = next(self._chunks)
+                    self._offset = 0
+                except StopIteration:
+                    break
+
+            end = len(self._chunk) if size < 0 else self._offset + remaining
+            piece = self._chunk[self._offset:end]
+            self._offset += len(piece)
+            remaining -= len(piece)
+            data.append(piece)
+
+        return b''.join(data)
+
 
 class HttpApi(HttpApiBase):
     def __init__(self, connection):
-        if URLLIB3_IMPORT_ERROR:
-            raise AnsibleError('urllib3 must be installed to use this httpapi plugin') from URLLIB3_IMPORT_ERROR
-
         super(HttpApi, self).__init__(connection)
         self.headers = BASE_HEADERS
         self.access_token = None
         self.refresh_token = None
         self.token_timeout = None
+        self.token_refresh_at = None
+        self._auth_lock = threading.RLock()
+        self._init_lock = threading.Lock()
+        self._rate_limiter = None
+        self._response_cache = None
+        self._name_indexes = {}
+        self._name_index_lock = threading.Lock()
 
     def handle_httperror(self, exc):
+        # Errors are handled by send_request, which will retry, re-authenticate or raise as appropriate
+        return False
+
+    def _get_rate_limiter(self) -> RateLimiter:
+        # The first requests may be sent by several send_requests workers at once,
+        # which must all share the same limiter
+        if self._rate_limiter is None:
+            with self._init_lock:
+                if self._rate_limiter is None:
+                    self._rate_limiter = RateLimiter(
+                        self.get_option('morpheus_rate_limit'),
+                        self.get_option('morpheus_max_in_flight')
+                    )
+
+        return self._rate_limiter
+
+    def _get_response_cache(self) -> ResponseCache:
+        if self._response_cache is None and self.get_option('morpheus_cache'):
+            with self._init_lock:
+                if self._response_cache is None:
+                    self._response_cache = ResponseCache(self.get_option('morpheus_cache_ttl'))
+
+        return self._response_cache
+
+    def _invalidate_cache(self, method: str):
+        # Any modification may be reflected in other endpoints, e.g. an instance action
+        # changes the instance, so clear everything rather than just the request path
+        if method.upper() not in SAFE_METHODS and self._response_cache is not None:
+            self._response_cache.clear()
+
+    @contextmanager
+    def _invalidating_cache(self, method: str):
+        # Cleared again once the request completes, as requests sent meanwhile may have
+        # been answered before the modification was made
+        self._invalidate_cache(method)
+        try:
+            yield
+        finally:
+            self._invalidate_cache(method)
+
+    def _cached_response(self, entry: dict, fields: list = None, fields_key: str = None) -> dict:
+        contents = self._response_to_json(entry['body'])
+
+        if fields is not None:
+            contents = self._project_fields(contents, fields_key, fields)
+
+        return dict(code=entry['code'], contents=contents, retries=0, cached=True)
+
+    def _retry_after(self, exc, attempt: int) -> float:
+        """Determine how long to wait before retrying a request that was rate limited by the appliance.
+
+        Args:
+            exc (HTTPError): The 429 error response.
+            attempt (int): The number of attempts made so far.
+
+        Returns:
+            float: Number of seconds to wait.
+        """
+        retry_after = exc.headers.get('Retry-After') if exc.headers is not None else None
+
+        if retry_after is not None:
+            try:
+                return min(max(0.0, float(retry_after)), MAX_RETRY_BACKOFF)
+            except ValueError:
+                pass
+
+            try:
+                return min(max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()), MAX_RETRY_BACKOFF)
+            except (TypeError, ValueError):
+                pass
+
+        return min(self.get_option('morpheus_retry_backoff') * 2 ** (attempt - 1), MAX_RETRY_BACKOFF)
+
+    def _raise_for_5xx(self, exc):
         # Handle 5xx errors
         err_5xx = r'^5\d{2}$'
 
@@ -80,12 +683,6 @@ class HttpApi(HttpApiBase):
         if handled_error:
             raise AnsibleConnectionFailure('Could not connect to {0}: {1}'.format(self.connection._url, exc.reason))
 
-        # Handle 401 errors
-        if exc.code == 401:
-            raise AnsibleAuthenticationFailure('Authentication Failure')
-
-        return False
-
     def login(self, username, password):
         # The specification of ansible_user results in Ansible attempting a HTTP Basic Auth attempt,
         # this is incompatible with the morpheus login endpoint, therefore we raise an exception
@@ -98,55 +695,403 @@ class HttpApi(HttpApiBase):
             self.access_token = api_token
             self.headers['Authorization'] = 'Bearer {0}'.format(self.access_token)
 
+            if self.get_option('morpheus_api_token_validation') == 'lazy':
+                return
+
+            token_digest = sha256(api_token.encode()).hexdigest()
+            if token_digest in VALIDATED_TOKENS:
+                return
+
+            cached = self._read_token_cache()
+            if cached.get('validated_at', 0) + TOKEN_CACHE_VALIDATION_TTL > time.time():
+                VALIDATED_TOKENS.add(token_digest)
+                return
+
             # Call the whoami endpoint as a means of checking token validity
             response = self.send_request(path=WHOAMI_PATH)
+            if response['code'] == 200:
+                VALIDATED_TOKENS.add(token_digest)
+                self._write_token_cache({'validated_at': time.time()})
+            return
+
+        if self._load_cached_token():
+            return
+
+        self._password_login()
+
+    def _load_cached_token(self) -> bool:
+        cached = self._read_token_cache()
+
+        try:
+            expires_at = cached['expires_at']
+            self.access_token = cached['access_token']
+            self.refresh_token = cached['refresh_token']
+            self.token_timeout = cached['token_timeout']
+        except KeyError:
+            return False
+
+        self.token_refresh_at = expires_at - min(TOKEN_REFRESH_MARGIN, self.token_timeout // 2)
+        self.headers['Authorization'] = 'Bearer {0}'.format(self.access_token)
+
+        if self._token_expiring():
+            self._refresh_access_token()
+
+        return True
+
+    def _token_cache_file(self) -> str:
+        api_token = self.get_option('morpheus_api_token')
+        identity = 'token:{0}'.format(sha256(api_token.encode()).hexdigest()) if api_token \
+            else 'user:{0}'.format(self.get_option('morpheus_user'))
+        cache_key = sha256('{0}|{1}'.format(self.connection._url, identity).encode()).hexdigest()
+
+        return os.path.join(os.path.expanduser(self.get_option('morpheus_token_cache_path')), cache_key)
+
+    def _read_token_cache(self) -> dict:
+        if not self.get_option('morpheus_token_cache'):
+            return {}
+
+        try:
+            with open(self._token_cache_file(), 'r') as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_token_cache(self, entry: dict):
+        if not self.get_option('morpheus_token_cache'):
             return
 
+        cache_file = self._token_cache_file()
+        cache_dir = os.path.dirname(cache_file)
+
+        try:
+            os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+            with os.fdopen(fd, 'w') as tmp_file:
+                json.dump(entry, tmp_file)
+            os.replace(tmp_path, cache_file)
+        except OSError as exc:
+            self.connection.queue_message('warning', 'Failed to write token cache: {0}'.format(exc))
+
+    def _password_login(self):
         username = self.get_option('morpheus_user')
         password = self.get_option('morpheus_password')
 
         if username and password:
             payload = 'username={0}&password={1}'.format(username, password)
-            headers = {
-                'Accept': 'application/json',
-                'Content-Type': 'application/x-www-form-urlencoded'
-            }
-            response = self.send_request(payload, path=LOGIN_PATH, method='POST', headers=headers)
+            response = self.send_request(payload, path=LOGIN_PATH, method='POST', headers=FORM_HEADERS.copy())
 
-            try:
-                self.access_token = response['contents']['access_token']
-                self.refresh_token = response['contents']['refresh_token']
-                self.token_timeout = response['contents']['expires_in']
-                self.headers['Authorization'] = 'Bearer {0}'.format(self.access_token)
-            except KeyError:
+            if not self._set_access_token(response):
                 raise AnsibleAuthenticationFailure('Failed to retrieve an access_token: %s' % response)
             return
 
         raise AnsibleAuthenticationFailure('Username and Password or API Token required for login')
 
+    def _refresh_access_token(self, stale_token: str = None):
+        """Obtain a new access token using the refresh_token grant, falling back to a full
+        login should the refresh token also have expired.
+
+        Args:
+            stale_token (str, optional): The token that was in use when the refresh was deemed necessary,
+             if another thread has since replaced it no refresh is performed. Defaults to None.
+        """
+        with self._auth_lock:
+            if stale_token is not None and stale_token != self.access_token:
+                return
+
+            if self.refresh_token is not None:
+                payload = 'refresh_token={0}'.format(self.refresh_token)
+                try:
+                    response = self.send_request(payload, path=REFRESH_PATH, method='POST', headers=FORM_HEADERS.copy())
+                except AnsibleAuthenticationFailure:
+                    response = {}
+
+                if self._set_access_token(response):
+                    return
+
+            self._password_login()
+
+    def _set_access_token(self, response: dict) -> bool:
+        try:
+            self.access_token = response['contents']['access_token']
+            self.refresh_token = response['contents'].get('refresh_token', self.refresh_token)
+            self.token_timeout = response['contents']['expires_in']
+        except (KeyError, TypeError, AttributeError):
+            return False
+
+        # Refresh ahead of expiry, but never sooner than halfway through the tokens lifetime
+        expires_at = time.time() + self.token_timeout
+        self.token_refresh_at = expires_at - min(TOKEN_REFRESH_MARGIN, self.token_timeout // 2)
+        self.headers['Authorization'] = 'Bearer {0}'.format(self.access_token)
+
+        self._write_token_cache({
+            'access_token': self.access_token,
+            'refresh_token': self.refresh_token,
+            'token_timeout': self.token_timeout,
+            'expires_at': expires_at
+        })
+        return True
+
+    def _retry_wait(self, method: str, attempt: int, any_method: bool = False) -> bool:
+        """Determine if a failed request can be retried, and if so wait before the next attempt.
+
+        Args:
+            method (str): The HTTP method of the request.
+            attempt (int): The number of attempts made so far.
+            any_method (bool, optional): Retry regardless of the request method. Defaults to False.
+
+        Returns:
+            bool: True if the request should be retried.
+        """
+        retry_methods = [retry_method.upper() for retry_method in self.get_option('morpheus_retry_methods')]
+
+        if (not any_method and method.upper() not in retry_methods) or attempt >= self.get_option('morpheus_retry_attempts'):
+            return False
+
+        backoff = min(self.get_option('morpheus_retry_backoff') * 2 ** (attempt - 1), MAX_RETRY_BACKOFF)
+        if self.get_option('morpheus_retry_jitter'):
+            backoff = random.uniform(0, backoff)
+
+        time.sleep(backoff)
+        return True
+
+    def _token_expiring(self) -> bool:
+        return self.refresh_token is not None and self.token_refresh_at is not None and time.time() >= self.token_refresh_at
+
+    def get_page_size(self) -> int:
+        """Get the number of items to request in each page of a list request.
+
+        Returns:
+            int: The morpheus_page_size option, 0 to request all items with a single request.
+        """
+        return self.get_option('morpheus_page_size')
+
+    def get_by_name(self, path: str, list_key: str, name: str) -> dict:
+        """Look up objects by name in the index of a list endpoint, building the index with
+        list requests should it not have been built or have expired.
+
+        Args:
+            path (str): The path of the list endpoint.
+            list_key (str): The response key containing the list of objects.
+            name (str): The name of the objects, matched case insensitively.
+
+        Returns:
+            dict: Whether name indexes are enabled, and the indexed objects with a matching name,
+            or None if the index is disabled or could not be built.
+        """
+        ttl = self.get_option('morpheus_name_index_ttl')
+
+        if ttl <= 0:
+            return dict(enabled=False, items=None)
+
+        with self._name_index_lock:
+            index = self._name_indexes.get(path)
+
+            if index is not None and time.monotonic() - index['built'] >= ttl:
+                del self._name_indexes[path]
+                index = None
+
+        if index is None:
+            items = self._list_all(path, list_key)
+
+            if items is None:
+                return dict(enabled=True, items=None)
+
+            names = {}
+            for item in items:
+                if isinstance(item, dict) and isinstance(item.get('name'), str):
+                    names.setdefault(item['name'].casefold(), []).append(item)
+
+            index = dict(built=time.monotonic(), names=names)
+
+            with self._name_index_lock:
+                self._name_indexes[path] = index
+
+        with self._name_index_lock:
+            items = list(index['names'].get(name.casefold(), []))
+
+        return dict(enabled=True, items=items)
+
+    def _list_all(self, path: str, list_key: str) -> list:
+        # Request every object of a list endpoint one page at a time, until the total is
+        # reached or a short or empty page is returned, None if a request fails
+        page_size = self.get_option('morpheus_page_size')
+        step = None
+        items = []
+
+        while True:
+            response = self.send_request(path='{0}?max={1}&offset={2}'.format(path, page_size if page_size > 0 else -1, len(items)))
+            contents = response.get('contents')
+            page = contents.get(list_key) if response.get('code') == 200 and isinstance(contents, dict) else None
+
+            if not isinstance(page, list):
+                return None
+
+            items.extend(page)
+
+            # The appliance may return fewer objects than requested per page
+            step = len(page) if step is None else step
+
+            try:
+                total = int(contents['meta']['total'])
+            except (KeyError, TypeError, ValueError):
+                total = None
+
+            if page_size <= 0 or len(page) == 0 or (total is not None and len(items) >= total) or \
+                    (total is None and len(page) < step):
+                return items
+
+    def update_name_index(self, path: str, item_id: int, item: dict = None):
+        """Update the index of a list endpoint after an object has been created, updated or deleted.
+
+        Args:
+            path (str): The path of the list endpoint.
+            item_id (int): The id of the object.
+            item (dict, optional): The current object, or None if it was deleted. Defaults to None.
+        """
+        with self._name_index_lock:
+            index = self._name_indexes.get(path)
+
+            if index is None:
+                return
+
+            for name, items in list(index['names'].items()):
+                items[:] = [i for i in items if i.get('id') != item_id]
+                if len(items) == 0:
+                    del index['names'][name]
+
+            if item is not None and isinstance(item.get('name'), str):
+                index['names'].setdefault(item['name'].casefold(), []).append(item)
+
+    def invalidate_name_index(self, path: str = None):
+        """Discard the index of a list endpoint, or of all endpoints if no path is given.
+        """
+        with self._name_index_lock:
+            if path is None:
+                self._name_indexes.clear()
+            else:
+                self._name_indexes.pop(path, None)
+
     def send_request(self, data=None, **kwargs) -> dict:
         path = kwargs.pop('path', None)
         method = kwargs.pop('method', 'GET')
         headers = kwargs.pop('headers', self.headers)
+        fields = kwargs.pop('fields', None)
+        fields_key = kwargs.pop('fields_key', None)
+        is_auth_request = path is not None and path.startswith(OAUTH_PATH)
+
+        if not is_auth_request and self._token_expiring():
+            self._refresh_access_token(self.access_token)
 
-        if 'Authorization' not in headers and self.access_token is not None:
+        if not is_auth_request and 'Authorization' not in headers and self.access_token is not None:
             headers['Authorization'] = 'Bearer {0}'.format(self.access_token)
 
         if headers['Content-Type'].split(';')[0] not in ['application/x-www-form-urlencoded', 'application/octet-stream', 'multipart/form-data']:
             data = json.dumps(data) if data is not None else None
 
-        try:
-            response, response_data = self.connection.send(path, data, method=method, headers=headers, **kwargs)
-        except HTTPError as exc:
-            try:
-                exc_data = self._response_to_json(exc.read())
-            except ConnectionError:
-                exc_data = exc.read()
+        with self._invalidating_cache(method):
+            cache = self._get_response_cache() if method.upper() == 'GET' and not is_auth_request else None
+            cached = cache.get(path) if cache is not None else None
+            generation = cache.generation if cache is not None else None
+
+            if cached is not None:
+                if cache.fresh(cached):
+                    return self._cached_response(cached, fields, fields_key)
+
+                headers = dict(headers, **cache.validators(cached))
+
+            attempt = 0
+            reauthenticated = False
+            while True:
+                attempt += 1
+                request_token = self.access_token
+                try:
+                    with self._get_rate_limiter().request():
+                        response, response_data = self.connection.send(path, data, method=method, headers=headers, **kwargs)
+                except HTTPError as exc:
+                    if exc.code == 304 and cached is not None:
+                        cache.revalidated(path, cached, exc.headers, generation)
+                        return self._cached_response(cached, fields, fields_key)
+
+                    if exc.code == 429 and attempt < self.get_option('morpheus_retry_attempts'):
+                        # The request was not processed, so can be retried regardless of method,
+                        # all requests on this connection are held back until the appliance is ready
+                        self._get_rate_limiter().pause(self._retry_after(exc, attempt))
+                        continue
+
+                    if exc.code in self.get_option('morpheus_retry_status_codes') and self._retry_wait(method, attempt):
+                        continue
+
+                    self._raise_for_5xx(exc)
+
+                    if exc.code == 401:
+                        # Retry once with a refreshed access token, API tokens cannot be refreshed
+                        if is_auth_request or reauthenticated or self.refresh_token is None:
+                            raise AnsibleAuthenticationFailure('Authentication Failure')
+
+                        self._refresh_access_token(request_token)
+                        headers['Authorization'] = 'Bearer {0}'.format(self.access_token)
+                        reauthenticated = True
+                        continue
+
+                    exc_data = self._error_response_value(exc)
+
+                    return dict(code=exc.code, contents=exc_data, path=path, retries=attempt - 1)
+                except AnsibleAuthenticationFailure:
+                    raise
+                except (AnsibleConnectionFailure, HTTPException, OSError):
+                    # Connection failures and resets
+                    if self._retry_wait(method, attempt):
+                        continue
+                    raise
+
+                response_value = self._get_response_value(response_data, response.info())
+                contents = self._response_to_json(response_value)
+
+                if cache is not None:
+                    cache.store(path, response.getcode(), response_value, response.info(), generation)
+
+                if fields is not None:
+                    contents = self._project_fields(contents, fields_key, fields)
 
-            return dict(code=exc.code, contents=exc_data, path=path)
+                return dict(code=response.getcode(), contents=contents, retries=attempt - 1)
 
-        response_value = self._get_response_value(response_data)
-        return dict(code=response.getcode(), contents=self._response_to_json(response_value))
+    def send_requests(self, requests: list[dict], workers: int = 1, isolate_errors: bool = False) -> list[dict]:
+        """Send multiple requests concurrently using a bounded pool of worker threads.
+
+        Args:
+            requests (list[dict]): List of requests, each a dictionary of send_request arguments,
+             e.g. {'path': '/api/instances?max=100&offset=100', 'method': 'GET', 'data': None}
+            workers (int, optional): Maximum number of requests to send at once. Defaults to 1.
+            isolate_errors (bool, optional): Return a failure response for a request that raises an exception,
+             instead of raising the exception once all requests have completed. Defaults to False.
+
+        Returns:
+            list[dict]: List of responses, in the same order as the requests.
+        """
+        if len(requests) == 0:
+            return []
+
+        # Ensure login has taken place before any worker threads send requests
+        self.connection._connect()
+
+        workers = max(1, min(workers, MAX_WORKERS, len(requests)))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(self.send_request, request.pop('data', None), **request)
+                for request in requests
+            ]
+
+        responses = []
+        for request, future in zip(requests, futures):
+            try:
+                responses.append(future.result())
+            except Exception as exc:
+                if not isolate_errors:
+                    raise
+                responses.append(dict(code=None, contents={'success': False, 'msg': to_text(exc)}, path=request.get('path')))
+
+        return responses
 
     def multipart_upload(self, uri_path: str, file_data: list[dict]) -> dict:
         """Takes a list of files for multipart/form-data file uploads.
@@ -159,40 +1104,207 @@ class HttpApi(HttpApiBase):
         Returns:
             dict: Dictionary containing response code and any returned data.
         """
-        request_fields = []
-        for item in file_data:
-            with open(item['file_path'], 'rb') as file_item:
-                rf = RequestField(
-                    name=item['name'],
-                    data=file_item.read(),
-                    filename=file_item.name.split('/')[-1])
-                rf.make_multipart()
-                request_fields.append(rf)
-
-        body, content_type = encode_multipart_formdata(request_fields)
-        headers = self.headers.copy()
-        headers['Content-Type'] = content_type
-        headers['Content-Length'] = len(body)
+        with self._invalidating_cache('POST'):
+            reauthenticated = False
+            while True:
+                if self._token_expiring():
+                    self._refresh_access_token(self.access_token)
 
-        try:
-            response, response_data = self.connection.send(uri_path, body, method='POST', headers=headers)
-        except HTTPError as exc:
+                # The body is read as it is sent, so each attempt needs a new stream
+                body = MultipartStream(file_data)
+                headers = self.headers.copy()
+                headers['Content-Type'] = body.content_type
+                headers['Content-Length'] = str(body.content_length)
+                request_token = self.access_token
+
+                try:
+                    with self._get_rate_limiter().request():
+                        response, response_data = self.connection.send(uri_path, body, method='POST', headers=headers)
+                except HTTPError as exc:
+                    self._raise_for_5xx(exc)
+
+                    if exc.code == 401:
+                        # Retry once with a refreshed access token, API tokens cannot be refreshed
+                        if reauthenticated or self.refresh_token is None:
+                            raise AnsibleAuthenticationFailure('Authentication Failure')
+
+                        self._refresh_access_token(request_token)
+                        reauthenticated = True
+                        continue
+
+                    exc_data = self._error_response_value(exc)
+
+                    return dict(code=exc.code, contents=exc_data, path=uri_path)
+
+                break
+
+            response_value = self._get_response_value(response_data, response.info())
+            contents = self._response_to_json(response_value)
+            return dict(code=response.getcode(), contents=contents)
+
+    def upload_file(self, uri_path: str, file_path: str) -> dict:
+        """Upload a local file as an application/octet-stream request body, streamed from disk in chunks.
+        Should the upload fail part way through it is restarted, as the appliance does not support
+        resuming a partial upload.
+
+        Args:
+            uri_path (str): Send request to this path.
+            file_path (str): Path to the file to upload.
+
+        Returns:
+            dict: Dictionary containing response code, any returned data, the number of bytes sent
+            and the number of times the upload was retried.
+        """
+        with self._invalidating_cache('POST'):
+            # The whole upload is performed within a single request to the persistent connection,
+            # so must finish before ansible-connection's command timeout
             try:
-                exc_data = self._response_to_json(exc.read())
-            except ConnectionError:
-                exc_data = exc.read()
+                deadline = time.monotonic() + self.connection.get_option('persistent_command_timeout')
+            except KeyError:
+                deadline = None
+
+            attempt = 0
+            reauthenticated = False
+            while True:
+                attempt += 1
+
+                if self._token_expiring():
+                    self._refresh_access_token(self.access_token)
+
+                body = FileStream(file_path, progress=partial(self._upload_progress, deadline=deadline, started=time.monotonic()))
+                headers = self.headers.copy()
+                headers['Content-Type'] = 'application/octet-stream'
+                headers['Content-Length'] = str(body.content_length)
+                request_token = self.access_token
+
+                try:
+                    with self._get_rate_limiter().request():
+                        response, response_data = self.connection.send(uri_path, body, method='POST', headers=headers)
+                except HTTPError as exc:
+                    if exc.code in self.get_option('morpheus_retry_status_codes') and self._retry_wait('POST', attempt, True):
+                        continue
+
+                    self._raise_for_5xx(exc)
+
+                    if exc.code == 401:
+                        # Retry once with a refreshed access token, API tokens cannot be refreshed
+                        if reauthenticated or self.refresh_token is None:
+                            raise AnsibleAuthenticationFailure('Authentication Failure')
+
+                        self._refresh_access_token(request_token)
+                        reauthenticated = True
+                        continue
+
+                    exc_data = self._error_response_value(exc)
+
+                    return dict(code=exc.code, contents=exc_data, path=uri_path, bytes_sent=body.bytes_read, retries=attempt - 1)
+                except (AnsibleAuthenticationFailure, UploadTimeoutError):
+                    raise
+                except (AnsibleConnectionFailure, HTTPException, OSError):
+                    if self._retry_wait('POST', attempt, True):
+                        continue
+                    raise
+                finally:
+                    body.close()
+
+                response_value = self._get_response_value(response_data, response.info())
+                contents = self._response_to_json(response_value)
+                return dict(code=response.getcode(), contents=contents, bytes_sent=body.bytes_read, retries=attempt - 1)
+
+    def _upload_progress(self, file_path: str, bytes_read: int, total: int, deadline: float = None, started: float = None):
+        self.connection.queue_message(
+            'vvv',
+            'Uploaded {0} of {1} bytes ({2}%) of {3}'.format(bytes_read, total, bytes_read * 100 // max(total, 1), file_path)
+        )
+
+        if deadline is None or started is None or bytes_read == 0 or bytes_read >= total:
+            return
 
-            return dict(code=exc.code, contents=exc_data, path=uri_path)
+        now = time.monotonic()
+        finish = now + (total - bytes_read) * (now - started) / bytes_read
 
-        response_value = self._get_response_value(response_data)
-        contents = self._response_to_json(response_value)
-        return dict(code=response.getcode(), contents=contents)
+        if finish > deadline:
+            raise UploadTimeoutError(
+                'Uploading {0} would take about {1} seconds at the current rate, exceeding the persistent command timeout of '
+                '{2} seconds, increase ansible_command_timeout to allow the upload to finish'.format(
+                    file_path, int(finish - started) + 1, self.connection.get_option('persistent_command_timeout')
+                )
+            )
 
-    def _get_response_value(self, response_data):
-        return to_text(response_data.getvalue())
+    def _error_response_value(self, exc):
+        response_value = self._get_response_value(BytesIO(exc.read()), exc.headers)
+
+        try:
+            return self._response_to_json(response_value)
+        except ConnectionError:
+            return to_text(response_value)
+
+    def _get_response_value(self, response_data, headers=None):
+        content_encoding = headers.get('Content-Encoding', '').lower() if headers is not None else ''
+
+        response_data.seek(0)
+        magic = response_data.read(2)
+        response_data.seek(0)
+
+        # The response may already have been decoded by open_url, in which case it will not have a gzip header
+        if content_encoding in ['gzip', 'x-gzip'] and magic == b'\x1f\x8b':
+            wbits = 31
+        elif content_encoding == 'deflate':
+            # Deflate responses may or may not include a zlib header
+            wbits = 15 if len(magic) == 2 and magic[0] & 0x0f == 8 and int.from_bytes(magic, 'big') % 31 == 0 else -15
+        else:
+            return response_data.getvalue()
+
+        decoder = zlib.decompressobj(wbits)
+        chunks = []
+
+        try:
+            while True:
+                chunk = response_data.read(DECOMPRESS_CHUNK_SIZE)
+                if not chunk:
+                    break
+                chunks.append(decoder.decompress(chunk))
+            chunks.append(decoder.flush())
+        except zlib.error:
+            return response_data.getvalue()
+
+        return b''.join(chunks)
+
+    def _project_fields(self, contents, list_key: str, fields: list):
+        """Strip each item in a list response down to the requested fields, so unwanted
+        keys are discarded before the response is serialized back to the module.
+
+        Args:
+            contents: The parsed response.
+            list_key (str): The response key containing the list of items.
+            fields (list): Keys of each item to retain, in the format used by dict_filter.
+
+        Returns:
+            The response with the list of items projected, other responses are returned unchanged.
+        """
+        if not isinstance(contents, dict) or not isinstance(contents.get(list_key), list):
+            return contents
+
+        contents[list_key] = [
+            dict_filter(item, fields) if isinstance(item, dict) else item
+            for item in contents[list_key]
+        ]
+
+        return contents
+
+    def _response_to_json(self, response_value):
+        if not response_value:
+            return {}
+
+        # Parse the bytes directly, avoiding a decoded copy of the response
+        if orjson is not None:
+            try:
+                return orjson.loads(response_value)
+            except ValueError:
+                # orjson is stricter than the json module, e.g. it rejects NaN
+                pass
 
-    def _response_to_json(self, response_text):
         try:
-            return json.loads(response_text) if response_text else {}
+            return json.loads(to_text(response_value))
         except ValueError:
-            raise ConnectionError('Invalid JSON response: %s' % response_text)
+            raise ConnectionError('Invalid JSON response: %s' % to_text(response_value))
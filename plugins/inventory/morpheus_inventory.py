@@ -7,6 +7,8 @@ DOCUMENTATION = r'''
     name: morpheus_inventory
     short_description: Returns Ansible inventory from Morpheus
     description: Returns Ansible inventory from Morpheus
+    extends_documentation_fragment:
+        - inventory_cache
     options:
         plugin:
             description: Morpheus Inventory
@@ -27,12 +29,19 @@ DOCUMENTATION = r'''
         morpheus_api_key:
             description: Morpheus API Key - Can be a vault encrypted string
             required: false
+        concurrency:
+            description: Number of concurrent requests made to resolve the containers and servers of matched instances
+            required: false
+            type: int
+            default: 4
+            version_added: 0.8.0
 '''
 
 import os
 import sys
 from builtins import str
-from ansible.plugins.inventory import BaseInventoryPlugin
+from concurrent.futures import ThreadPoolExecutor
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable
 from ansible.errors import AnsibleError, AnsibleParserError
 
 try:
@@ -44,6 +53,8 @@ else:
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except (ImportError, ModuleNotFoundError) as imp_exc:
     REQUESTS_IMPORT_ERROR = imp_exc
 else:
@@ -57,7 +68,19 @@ else:
     YAML_IMPORT_ERROR = None
 
 
-class InventoryModule(BaseInventoryPlugin):
+# Maximum number of ids in each list request filtered by id
+ID_FILTER_BATCH_SIZE = 100
+
+# Connections kept open to the Morpheus appliance by the session
+SESSION_POOL_MAXSIZE = 16
+
+# Retries of requests failing with a connection error or one of the retry statuses
+SESSION_RETRIES = 3
+SESSION_RETRY_BACKOFF = 0.5
+SESSION_RETRY_STATUSES = [502, 503, 504]
+
+
+class InventoryModule(BaseInventoryPlugin, Cacheable):
     NAME = 'morpheus_inventory'
 
     def __init__(self):
@@ -79,6 +102,8 @@ class InventoryModule(BaseInventoryPlugin):
             'sslverify': True
         }
         self.morpheus_version = None
+        self.session = None
+        self.concurrency = 1
         self.morpheus_oldmetadata = False
         self.morpheus_simulate = False
         self.morpheus_simulate_agent = False
@@ -86,19 +111,76 @@ class InventoryModule(BaseInventoryPlugin):
         self.workspace = ""
         self.groups = None
         self.verbose = False
+        self.containers = {}
+        self.servers = {}
+        self.pending_instances = []
+        self.datasets = {}
+        self.instance_indexes = {}
+        self.inventory_data = {'groups': {}, 'hosts': {}}
 
     def print_verbose_message(self, msg):
         if self.verbose:
             print("morpheus_inventory: %s" % msg)
 
-    def _set_version_from_morpheus(self):
+    # The groups, hosts and variables added to the inventory are also recorded in
+    # inventory_data, which is stored in the inventory cache when it is enabled
+    def _add_group(self, group):
+        group = self.inventory.add_group(group)
+        self.inventory_data['groups'].setdefault(group, {'children': []})
+        return group
+
+    def _add_child(self, group, child):
+        self.inventory.add_child(group, child)
+        children = self.inventory_data['groups'].setdefault(group, {'children': []})['children']
+        if child not in children:
+            children.append(child)
+
+    def _add_host(self, host, group=None):
+        host = self.inventory.add_host(host=host, group=group)
+        hostdata = self.inventory_data['hosts'].setdefault(host, {'groups': [], 'vars': {}})
+        if group is not None and group not in hostdata['groups']:
+            hostdata['groups'].append(group)
+        return host
+
+    def _set_variable(self, host, varname, value):
+        self.inventory.set_variable(host, varname, value)
+        self.inventory_data['hosts'].setdefault(host, {'groups': [], 'vars': {}})['vars'][varname] = value
+
+    def _populate_from_cache(self, inventory_data):
+        for group in inventory_data['groups']:
+            self.inventory.add_group(group)
+        for group, groupdata in inventory_data['groups'].items():
+            for child in groupdata['children']:
+                self.inventory.add_child(group, child)
+        for host, hostdata in inventory_data['hosts'].items():
+            self.inventory.add_host(host)
+            for group in hostdata['groups']:
+                self.inventory.add_host(host, group=group)
+            for varname, value in hostdata['vars'].items():
+                self.inventory.set_variable(host, varname, value)
+        self.inventory_data = inventory_data
+
+    def _create_session(self):
+        # A single session is used for every request, keeping connections to the
+        # appliance alive and retrying requests that fail with a transient error
+        retry = Retry(total=SESSION_RETRIES,
+                      backoff_factor=SESSION_RETRY_BACKOFF,
+                      status_forcelist=SESSION_RETRY_STATUSES,
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1,
+                              pool_maxsize=max(SESSION_POOL_MAXSIZE, self.concurrency),
+                              max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({'Authorization': "BEARER %s" % self.morpheus_token,
+                                "Content-Type": "application/json"})
+        session.verify = self.morpheus_opt_args['sslverify']
+        return session
 
-        headers = {'Authorization': "BEARER %s" % self.morpheus_token,
-                   "Content-Type": "application/json"}
-        method = "get"
-        verify = self.morpheus_opt_args['sslverify']
+    def _set_version_from_morpheus(self):
         versionapi = self.morpheus_api + "/ping"
-        v = getattr(requests, method)(versionapi, headers=headers, verify=verify)
+        v = self.session.get(versionapi)
         returned_v = v.json()
         self.morpheus_version = returned_v['buildVersion']
 
@@ -110,12 +192,19 @@ class InventoryModule(BaseInventoryPlugin):
             self.morpheus_oldmetadata = True
             self.print_verbose_message("Using old metadata model")
 
-    def _get_data_from_morpheus(self, searchtype, searchstring=None):
-        headers = {'Authorization': "BEARER %s" % self.morpheus_token,
-                   "Content-Type": "application/json"}
-        method = "get"
-        verify = self.morpheus_opt_args['sslverify']
+    def _get_dataset_from_morpheus(self, path):
+        # Each distinct list is requested once, however many groups are evaluated against it
+        if path not in self.datasets:
+            r = self.session.get(self.morpheus_api + path)
+            resultdict = r.json()
+            if 'error' in resultdict.keys():
+                raise AnsibleParserError("Error in Morpheus API call: %s" % resultdict['error'])
+            self.datasets[path] = resultdict
+        else:
+            self.print_verbose_message("Using previously requested %s" % path)
+        return self.datasets[path]
 
+    def _get_data_from_morpheus(self, searchtype, searchstring=None):
         if searchtype in ["label", "name", "tag"]:
             path = "/instances?max=-1"
         elif searchtype == "app" or searchtype == "all_apps":
@@ -135,11 +224,7 @@ class InventoryModule(BaseInventoryPlugin):
 
             if not cloud_is_numeric:
                 self.print_verbose_message("Searching for cloud by name")
-                cloudurl = self.morpheus_api + "/zones?max=-1"
-                cloudr = getattr(requests, method)(cloudurl, headers=headers, verify=verify)
-                cloudoutput = cloudr.json()
-                if 'error' in cloudoutput.keys():
-                    raise AnsibleParserError("Error in Morpheus API call: %s" % cloudoutput['error'])
+                cloudoutput = self._get_dataset_from_morpheus("/zones?max=-1")
                 for c in cloudoutput['zones']:
                     if c['code'] == searchstring:
                         cloudid = c['id']
@@ -150,37 +235,92 @@ class InventoryModule(BaseInventoryPlugin):
             else:
                 cloudid = searchstring
             path = "/instances?zoneId=%s&max=-1" % cloudid
+        return self._get_dataset_from_morpheus(path)
+
+    def _get_instance_index(self, rawresponse, indextype):
+        # Indexes are built once for each dataset, which is held in self.datasets
+        # for the lifetime of the plugin, so its id is not reused
+        indexes = self.instance_indexes.setdefault(id(rawresponse), {})
+        if indextype not in indexes:
+            index = {}
+            for instance in rawresponse['instances']:
+                if indextype == "label":
+                    if version.parse(self.morpheus_version) > version.parse("5.0"):
+                        labels = instance['labels']
+                    else:
+                        labels = instance['tags']
+                    for label in labels:
+                        index.setdefault(str(label).lower(), []).append((label, instance))
+                elif indextype == "tag":
+                    for tag in instance['tags']:
+                        index.setdefault((tag['name'], tag['value']), []).append((tag, instance))
+            indexes[indextype] = index
+        return indexes[indextype]
+
+    def _get_json_from_morpheus(self, path):
         url = self.morpheus_api + path
-        r = getattr(requests, method)(url, headers=headers, verify=verify)
-        if 'error' in r.json().keys():
-            raise AnsibleParserError("Error in Morpheus API call: %s" % r.json()['error'])
+        r = self.session.get(url)
         return r.json()
 
-    def _get_containers_from_morpheus(self, instanceid):
-        headers = {'Authorization': "BEARER %s" % self.morpheus_token,
-                   "Content-Type": "application/json"}
+    def _get_json_list_from_morpheus(self, paths):
+        # Responses are returned in the order of paths, the inventory itself is only
+        # modified by the calling thread
+        if self.concurrency <= 1 or len(paths) <= 1:
+            return [self._get_json_from_morpheus(path) for path in paths]
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(paths))) as executor:
+            return list(executor.map(self._get_json_from_morpheus, paths))
 
-        path = "/instances/%s/containers?max=-1" % instanceid
-        url = self.morpheus_api + path
-        method = "get"
-        verify = self.morpheus_opt_args['sslverify']
-        r = getattr(requests, method)(url, headers=headers, verify=verify)
-        return r.json()
+    def _get_containers_from_morpheus(self, instanceid):
+        if instanceid not in self.containers:
+            path = "/instances/%s/containers?max=-1" % instanceid
+            self.containers[instanceid] = self._get_json_from_morpheus(path)
+        return self.containers[instanceid]
+
+    def _load_containers(self, instances):
+        # Instances may already include the details of their containers, otherwise
+        # each instance's containers are requested once, however many groups it is in
+        instanceids = []
+        for instance in instances:
+            if instance['id'] in self.containers:
+                continue
+            details = instance.get('containerDetails')
+            if isinstance(details, list) and len(details) > 0 and \
+                    all(k in c for c in details for k in ['id', 'ip', 'externalHostname', 'server']):
+                self.containers[instance['id']] = {'containers': details}
+            else:
+                instanceids.append(instance['id'])
+
+        paths = ["/instances/%s/containers?max=-1" % instanceid for instanceid in instanceids]
+        for instanceid, containerdata in zip(instanceids, self._get_json_list_from_morpheus(paths)):
+            self.containers[instanceid] = containerdata
+
+    def _load_servers(self, serverids):
+        serverids = sorted(set(serverids) - set(self.servers.keys()))
+        batches = [serverids[idx:idx + ID_FILTER_BATCH_SIZE] for idx in range(0, len(serverids), ID_FILTER_BATCH_SIZE)]
+        paths = [
+            "/servers?max=%s&%s" % (len(batch), "&".join("id=%s" % serverid for serverid in batch))
+            for batch in batches
+        ]
+        for batch, resultdict in zip(batches, self._get_json_list_from_morpheus(paths)):
+            for server in resultdict.get('servers', []):
+                if server['id'] in batch:
+                    self.servers[server['id']] = server
+        self.print_verbose_message("Loaded details of %s servers" % len(self.servers))
 
     def _set_morpheus_connection_vars(self, hostname, ip, containerid, noagent=False, platform=None):
         if noagent == "null" or noagent is False:
             agent = True
         else:
             agent = False
-        self.inventory.set_variable(hostname, 'ansible_host', ip)
-        self.inventory.set_variable(hostname, 'ansible_user', 'morpheus-node')
-        self.inventory.set_variable(hostname, 'ansible_ssh_private_key_file', self.morpheusprivatekeyfile)
-        self.inventory.set_variable(hostname, 'ansible_morpheus_container_id', containerid)
+        self._set_variable(hostname, 'ansible_host', ip)
+        self._set_variable(hostname, 'ansible_user', 'morpheus-node')
+        self._set_variable(hostname, 'ansible_ssh_private_key_file', self.morpheusprivatekeyfile)
+        self._set_variable(hostname, 'ansible_morpheus_container_id', containerid)
         if agent:
             if platform == "windows":
-                self.inventory.set_variable(hostname, 'ansible_connection', 'morpheus_win')
+                self._set_variable(hostname, 'ansible_connection', 'morpheus_win')
             else:
-                self.inventory.set_variable(hostname, 'ansible_connection', 'morpheus')
+                self._set_variable(hostname, 'ansible_connection', 'morpheus')
 
     def _add_morpheus_instance_cloud_bytag(self, instance):
         if self.morpheus_oldmetadata:
@@ -188,27 +328,23 @@ class InventoryModule(BaseInventoryPlugin):
                 if str(tag['name']).startswith("Morpheus "):
                     continue
                 group = "%s_%s" % (tag['name'], tag['value'])
-                self.inventory.add_group(group)
+                self._add_group(group)
                 self.print_verbose_message("Found %s with tag %s=%s, adding to group %s" % (instance['name'], tag['name'], tag['value'], group))
                 self._add_morpheus_instance(group, instance)
         else:
             for tag in instance['tags']:
                 group = "%s_%s" % (tag['name'], tag['value'])
-                self.inventory.add_group(group)
+                self._add_group(group)
                 self.print_verbose_message("Found %s with tag %s=%s, adding to group %s" % (instance['name'], tag['name'], tag['value'], group))
                 self._add_morpheus_instance(group, instance)
 
     def _get_server_details(self, serverid):
-        headers = {'Authorization': "BEARER %s" % self.morpheus_token,
-                   "Content-Type": "application/json"}
-        method = "get"
-        verify = self.morpheus_opt_args['sslverify']
-        path = "/servers/%s" % serverid
-        url = self.morpheus_api + path
-        r = getattr(requests, method)(url, headers=headers, verify=verify)
-        resultdict = r.json()
+        if serverid not in self.servers:
+            path = "/servers/%s" % serverid
+            resultdict = self._get_json_from_morpheus(path)
+            self.servers[serverid] = resultdict['server']
 
-        return resultdict['server']
+        return self.servers[serverid]
 
     def _add_morpheus_container(self, group, containerid, container, platform_query=False, app_tier=None):
         server = self._get_server_details(container['server']['id'])
@@ -218,18 +354,18 @@ class InventoryModule(BaseInventoryPlugin):
                 group = "platform_undetected"
             else:
                 group = platform
-            self.inventory.add_group(group)
+            self._add_group(group)
             self.print_verbose_message("Matched %s with platform %s, adding to group %s" % (container['externalHostname'], group, group))
         if app_tier:
             self.print_verbose_message(container)
             self.print_verbose_message(app_tier)
             tiergroup = "%s_%s" % (group, app_tier)
-            self.inventory.add_group(group)
-            self.inventory.add_group(tiergroup)
-            self.inventory.add_child(group, tiergroup)
+            self._add_group(group)
+            self._add_group(tiergroup)
+            self._add_child(group, tiergroup)
             group = tiergroup
         container_hostname = container['externalHostname']
-        self.inventory.add_host(
+        self._add_host(
             host=container_hostname,
             group=group
         )
@@ -244,11 +380,29 @@ class InventoryModule(BaseInventoryPlugin):
                                                container['ip'], containerid,
                                                noagent, platform)
         else:
-            self.inventory.set_variable(container_hostname,
-                                        'ansible_host',
-                                        container['ip'])
+            self._set_variable(container_hostname,
+                               'ansible_host',
+                               container['ip'])
 
     def _add_morpheus_instance(self, group, instance, app_tier=None):
+        # Hosts are added once the details of all matched instances have been loaded together
+        self.pending_instances.append((group, instance, app_tier))
+
+    def _add_pending_instances(self):
+        pending = self.pending_instances
+        self.pending_instances = []
+
+        self._load_containers(list({instance['id']: instance for group, instance, app_tier in pending}.values()))
+        self._load_servers([
+            container['server']['id']
+            for group, instance, app_tier in pending
+            for container in self.containers[instance['id']].get('containers', [])
+        ])
+
+        for group, instance, app_tier in pending:
+            self._add_morpheus_instance_hosts(group, instance, app_tier)
+
+    def _add_morpheus_instance_hosts(self, group, instance, app_tier=None):
         platform_query = False
         if group == "platform_query":
             platform_query = True
@@ -274,17 +428,9 @@ class InventoryModule(BaseInventoryPlugin):
             except Exception as e:
                 raise AnsibleParserError("Cannot find morpheus private key in workspace directory") from e
         if searchtype == "label":
-            for instance in rawresponse['instances']:
-                if version.parse(self.morpheus_version) > version.parse("5.0"):
-                    for label in instance['labels']:
-                        if str(searchstring).lower() == str(label).lower():
-                            self.print_verbose_message("Matched %s with label %s, adding to group %s" % (instance['name'], label, group))
-                            self._add_morpheus_instance(group, instance)
-                else:
-                    for tag in instance['tags']:
-                        if str(searchstring).lower() == str(tag).lower():
-                            self.print_verbose_message("Matched %s with label %s, adding to group %s" % (instance['name'], tag, group))
-                            self._add_morpheus_instance(group, instance)
+            for label, instance in self._get_instance_index(rawresponse, "label").get(str(searchstring).lower(), []):
+                self.print_verbose_message("Matched %s with label %s, adding to group %s" % (instance['name'], label, group))
+                self._add_morpheus_instance(group, instance)
         elif searchtype == "name":
             for instance in rawresponse['instances']:
                 if searchstring in instance['name']:
@@ -314,11 +460,11 @@ class InventoryModule(BaseInventoryPlugin):
                 self._add_morpheus_instance_cloud_bytag(instance)
                 self._add_morpheus_instance("platform_query", instance)
         elif searchtype == "tag":
-            for instance in rawresponse['instances']:
-                for tag in instance['tags']:
-                    if searchstring['tagName'] == tag['name'] and searchstring['tagValue'] == tag['value']:
-                        self.print_verbose_message("Matched %s with tag %s=%s, adding to group %s" % (instance['name'], tag['name'], tag['value'], group))
-                        self._add_morpheus_instance(group, instance)
+            for tag, instance in self._get_instance_index(rawresponse, "tag").get((searchstring['tagName'], searchstring['tagValue']), []):
+                self.print_verbose_message("Matched %s with tag %s=%s, adding to group %s" % (instance['name'], tag['name'], tag['value'], group))
+                self._add_morpheus_instance(group, instance)
+
+        self._add_pending_instances()
 
     def verify_file(self, path):
         '''Return true/false if this is possibly a valid file for this plugin to
@@ -334,6 +480,7 @@ class InventoryModule(BaseInventoryPlugin):
         '''Return dynamic inventory from source '''
         super(InventoryModule, self).__init__()
         super(InventoryModule, self).parse(inventory, loader, path, cache)
+        self.inventory_data = {'groups': {}, 'hosts': {}}
 
         if self.display.verbosity > 1:
             self.verbose = True
@@ -387,25 +534,51 @@ class InventoryModule(BaseInventoryPlugin):
                 self.morpheus_simulate = config_data['morpheus_simulate']
             if 'morpheus_simulate_agent' in config_data:
                 self.morpheus_simulate_agent = config_data['morpheus_simulate_agent']
+            self.concurrency = self.get_option('concurrency')
 
         except Exception as e:
             raise AnsibleParserError("Options missing: %s" % e)
 
-        self._set_version_from_morpheus()
-        self.print_verbose_message("Morpheus version detected as: %s" % self.morpheus_version)
-        self._set_morpheus_oldmetadata()
-
-        for group in self.groups:
-            if group['searchtype'] == 'cloud':
-                self.print_verbose_message("Processing cloud %s" % group['searchstring'])
-                rawoutput = self._get_data_from_morpheus(searchtype=group['searchtype'], searchstring=group['searchstring'])
-                self._filter_morpheus_output(rawoutput, None, group['searchtype'], group['searchstring'])
-            elif group['searchtype'] == 'all_apps':
-                self.print_verbose_message("Processing all apps")
-                rawoutput = self._get_data_from_morpheus(searchtype=group['searchtype'])
-                self._filter_morpheus_output(rawoutput, None, group['searchtype'])
+        if self.concurrency < 1:
+            raise AnsibleParserError('concurrency must be 1 or greater')
+
+        cache_key = self.get_cache_key(path)
+        user_cache_setting = self.get_option('cache')
+        attempt_to_read_cache = user_cache_setting and cache
+        cache_needs_update = user_cache_setting and not cache
+
+        if attempt_to_read_cache:
+            try:
+                inventory_data = self._cache[cache_key]
+            except KeyError:
+                cache_needs_update = True
             else:
-                self.print_verbose_message("Processing group %s" % group['name'])
-                self.inventory.add_group(group['name'])
-                rawoutput = self._get_data_from_morpheus(searchtype=group['searchtype'])
-                self._filter_morpheus_output(rawoutput, group['name'], group['searchtype'], group['searchstring'])
+                self.print_verbose_message("Using inventory from cache")
+                self._populate_from_cache(inventory_data)
+                return
+
+        self.session = self._create_session()
+        try:
+            self._set_version_from_morpheus()
+            self.print_verbose_message("Morpheus version detected as: %s" % self.morpheus_version)
+            self._set_morpheus_oldmetadata()
+
+            for group in self.groups:
+                if group['searchtype'] == 'cloud':
+                    self.print_verbose_message("Processing cloud %s" % group['searchstring'])
+                    rawoutput = self._get_data_from_morpheus(searchtype=group['searchtype'], searchstring=group['searchstring'])
+                    self._filter_morpheus_output(rawoutput, None, group['searchtype'], group['searchstring'])
+                elif group['searchtype'] == 'all_apps':
+                    self.print_verbose_message("Processing all apps")
+                    rawoutput = self._get_data_from_morpheus(searchtype=group['searchtype'])
+                    self._filter_morpheus_output(rawoutput, None, group['searchtype'])
+                else:
+                    self.print_verbose_message("Processing group %s" % group['name'])
+                    self._add_group(group['name'])
+                    rawoutput = self._get_data_from_morpheus(searchtype=group['searchtype'])
+                    self._filter_morpheus_output(rawoutput, group['name'], group['searchtype'], group['searchstring'])
+        finally:
+            self.session.close()
+
+        if cache_needs_update:
+            self._cache[cache_key] = self.inventory_data
@@ -56,6 +56,23 @@ def param_filter(module: AnsibleModule, remove_params: list[str] = None) -> dict
     return api_params
 
 
+def response_fields(module: AnsibleModule, filter_items: dict = None) -> list | None:
+    """Returns the keys to retain for the requested level of detail, so that
+    list responses can be projected before they are returned by the connection.
+
+    Args:
+        module (AnsibleModule): An instantiated AnsibleModule Class.
+        filter_items (dict, optional): Dictionary of keys to filter. Defaults to None.
+
+    Returns:
+        list | None: A list of keys to retain, or None if all keys are required.
+    """
+    if filter_items is None or module.params['detail'] not in filter_items:
+        return None
+
+    return list(filter_items[module.params['detail']])
+
+
 def response_filter(module: AnsibleModule, response: dict | list, filter_items: dict = None) -> list[dict]:
     """Filters a response based on the supplied dictionary keys.
 
@@ -10,7 +10,7 @@ version_added: 0.5.0
 author: James Riach
 '''
 
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 try:
     import morpheus_funcs as mf
     from morpheusapi import ApiPath, MorpheusApi
@@ -21,25 +21,67 @@ except ModuleNotFoundError:
 
 class InstanceSnapshots():
     def __init__(self, instance_name: str, instance_id: int,
-                 morpheus_api: MorpheusApi, reverse_sort: bool = False) -> None:
+                 morpheus_api: MorpheusApi, reverse_sort: bool = False,
+                 snapshots: list = None) -> None:
         self._morpheus_api = morpheus_api
         self.instance_name = instance_name
         self.instance_id = instance_id
         self.snapshot_count = 0
         self.snapshots = []
 
-        self.get_snapshots()
+        if snapshots is None:
+            self.get_snapshots()
+        else:
+            self._set_snapshots(snapshots)
         self.sort(reverse=reverse_sort)
 
+    @classmethod
+    def from_instances(cls, instances: list[dict], morpheus_api: MorpheusApi,
+                       reverse_sort: bool = False) -> tuple:
+        """Retrieve the Snapshots for multiple Instances, concurrently when the MorpheusApi
+        has more than one worker.
+
+        Args:
+            instances (list[dict]): The Instances, each a dictionary with id and name keys.
+            morpheus_api (MorpheusApi): An instantiated MorpheusApi Class.
+            reverse_sort (bool, optional): Reverses the sort order, i.e. most recent datetime first. Defaults to False.
+
+        Returns:
+            tuple: (list[InstanceSnapshots], list[dict]) The Snapshots of each Instance they were retrieved for,
+            in the same order as instances, and the id, name and error message of each Instance they could not be
+            retrieved for.
+        """
+        responses = morpheus_api.get_instances_snapshots([instance['id'] for instance in instances])
+
+        instance_snapshots = []
+        failures = []
+        for instance, snapshots in zip(instances, responses):
+            if isinstance(snapshots, list):
+                instance_snapshots.append(cls(instance['name'], instance['id'], morpheus_api, reverse_sort, snapshots))
+                continue
+
+            failures.append({
+                'instance_id': instance['id'],
+                'instance_name': instance['name'],
+                'msg': snapshots.get('msg', snapshots) if isinstance(snapshots, dict) else snapshots
+            })
+
+        return instance_snapshots, failures
+
+    def _set_snapshots(self, snapshots: list) -> None:
+        self.snapshots = [mf.dict_keys_to_snake_case(snapshot) for snapshot in snapshots]
+        self.snapshot_count = len(self.snapshots)
+
     def get_snapshots(self) -> None:
         """Retrieve the Snapshots for the Instance
         """
-        self.snapshots = [
-            mf.dict_keys_to_snake_case(snapshot)
-            for snapshot in self._morpheus_api.get_instance_snapshots(self.instance_id)
-        ]
+        self._set_snapshots(self._morpheus_api.get_instance_snapshots(self.instance_id))
 
-        self.snapshot_count = len(self.snapshots)
+    @staticmethod
+    def _date_created(snapshot: dict) -> datetime:
+        date_format = '%Y-%m-%dT%H:%M:%SZ'
+
+        return datetime.strptime(snapshot['date_created'], date_format)
 
     def sort(self, reverse: bool = False) -> None:
         """Sorts the list of snapshots by datetime
@@ -47,13 +89,43 @@ class InstanceSnapshots():
         Args:
             reverse (bool, optional): Reverses the sort order, i.e. most recent datetime first. Defaults to False.
         """
-        date_format = '%Y-%m-%dT%H:%M:%SZ'
-
         self.snapshots.sort(
-            key=lambda dt: datetime.strptime(dt['date_created'], date_format),
+            key=self._date_created,
             reverse=reverse
         )
 
+    def expired(self, keep_last: int = None, keep_days: float = None, name_prefix: str = None) -> list[dict]:
+        """Returns the snapshots not retained by a retention policy. A snapshot is retained if it is
+        one of the keep_last most recent snapshots, or was created within the last keep_days.
+
+        Args:
+            keep_last (int, optional): Number of most recent snapshots to retain. Defaults to None.
+            keep_days (float, optional): Retain snapshots created within this many days. Defaults to None.
+            name_prefix (str, optional): Only apply the policy to snapshots with names starting with this prefix,
+             other snapshots are always retained. Defaults to None.
+
+        Returns:
+            list[dict]: The snapshots to remove, most recent first.
+        """
+        candidates = sorted(
+            [
+                snapshot for snapshot in self.snapshots
+                if name_prefix is None or (snapshot.get('name') or '').startswith(name_prefix)
+            ],
+            key=self._date_created,
+            reverse=True
+        )
+
+        # Snapshot dates are UTC
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=keep_days) \
+            if keep_days is not None else None
+
+        return [
+            snapshot for idx, snapshot in enumerate(candidates)
+            if not (keep_last is not None and idx < keep_last)
+            and not (cutoff is not None and self._date_created(snapshot) >= cutoff)
+        ]
+
 
 class SnapshotAction():
     """
@@ -74,28 +146,38 @@ class SnapshotAction():
         self.msg = ''
         self.success = False
 
-    def _create(self):
-        response = self._morpheus_api.snapshot_instance({
-            'id': self.instance_id,
-            'name': self.snapshot_name,
-            'description': self.snapshot_description
-        })
-        self.success, self.msg = mf.success_response(response)
-
-    def _remove(self):
-        response = self._morpheus_api.common_delete(ApiPath.SNAPSHOTS_PATH, self.snapshot_id)
-        self.success, self.msg = mf.success_response(response)
-
-    def _remove_all(self):
-        response = self._morpheus_api.delete_all_instance_snapshots(self.instance_id)
-        self.success, self.msg = mf.success_response(response)
-
-    def _revert(self):
-        response = self._morpheus_api.snapshot_revert(
-            self.instance_id,
-            self.snapshot_id
-        )
-        self.success, self.msg = mf.success_response(response)
+    def _request(self) -> dict:
+        return {
+            'create': lambda: self._morpheus_api._snapshot_instance_request({
+                'id': self.instance_id,
+                'name': self.snapshot_name,
+                'description': self.snapshot_description
+            }),
+            'remove': lambda: self._morpheus_api._delete_request(ApiPath.SNAPSHOTS_PATH, self.snapshot_id),
+            'remove_all': lambda: self._morpheus_api._delete_all_instance_snapshots_request(self.instance_id),
+            'revert': lambda: self._morpheus_api._snapshot_revert_request(self.instance_id, self.snapshot_id)
+        }[self.action]()
+
+    @staticmethod
+    def execute_all(actions: list['SnapshotAction'], morpheus_api: MorpheusApi) -> list[dict]:
+        """Perform the required action of multiple SnapshotActions, concurrently when the MorpheusApi
+        has more than one worker. A failed action is recorded against that action only.
+
+        Args:
+            actions (list[SnapshotAction]): The SnapshotActions to execute.
+            morpheus_api (MorpheusApi): An instantiated MorpheusApi Class.
+
+        Returns:
+            list[dict]: A Dictionary based on the Class Attributes of each SnapshotAction
+        """
+        responses = morpheus_api.send_requests([action._request() for action in actions], isolate_errors=True)
+
+        for action, response in zip(actions, responses):
+            response = response.get('contents', response) if isinstance(response, dict) \
+                else {'success': False, 'msg': str(response)}
+            action.success, action.msg = mf.success_response(response)
+
+        return [mf.class_to_dict(action) for action in actions]
 
     def execute(self) -> dict:
         """Perform the required action against the Snapshot
@@ -103,13 +185,4 @@ class SnapshotAction():
         Returns:
             dict: A Dictionary based on the Class Attributes
         """
-        action = {
-            'create': self._create,
-            'remove': self._remove,
-            'remove_all': self._remove_all,
-            'revert': self._revert
-        }.get(self.action)
-
-        action()
-
-        return mf.class_to_dict(self)
+        return SnapshotAction.execute_all([self], self._morpheus_api)[0]
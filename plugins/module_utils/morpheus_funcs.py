@@ -11,6 +11,7 @@ author: James Riach
 '''
 
 import re
+import time
 try:
     from morpheusapi import MorpheusApi
 except ModuleNotFoundError:
@@ -175,16 +176,16 @@ def dict_filter(dictionary: dict, filter_keys: list) -> dict:
     Returns:
         dict: A dictionary with only the keys specified in filter_keys
     """
-    subkey_filters = {k: v for k, v in enumerate(filter_keys) if isinstance(v, (list, set, tuple))}
+    subkey_filters = [v for v in filter_keys if isinstance(v, (list, set, tuple))]
 
-    if len(subkey_filters) > 0:
-        for k, v in subkey_filters.items():
-            filter_keys[k] = v[0]
+    # Resolve subkey filters to their parent key without modifying filter_keys,
+    # so the same filter can be applied to every item in a list
+    retain_keys = set(v[0] if isinstance(v, (list, set, tuple)) else v for v in filter_keys)
 
-    filtered_dict = {k: v for k, v in dictionary.items() if k in filter_keys}
+    filtered_dict = {k: v for k, v in dictionary.items() if k in retain_keys}
 
     if len(subkey_filters) > 0:
-        for k, v in subkey_filters.items():
+        for v in subkey_filters:
             try:
                 if isinstance(filtered_dict[v[0]], (list, set, tuple)):
                     for idx, itm in enumerate(filtered_dict[v[0]]):
@@ -371,3 +372,35 @@ def success_response(response: dict) -> tuple:
         msg = 'Unknown Failure'
 
     return success, msg
+
+
+def wait_for(poll_func, timeout: float, interval: float = 2.0, max_interval: float = 30.0) -> bool:
+    """Repeatedly call a polling function until nothing remains to wait for, or the timeout expires.
+        The interval between polls is doubled while nothing changes, up to max_interval, and
+        reset whenever the number of remaining items falls.
+
+    Args:
+        poll_func (callable): Function returning the number of items still being waited for.
+        timeout (float): Maximum number of seconds to wait.
+        interval (float, optional): Initial number of seconds between polls. Defaults to 2.0.
+        max_interval (float, optional): Maximum number of seconds between polls. Defaults to 30.0.
+
+    Returns:
+        bool: True if nothing remains to wait for, False if the timeout expired.
+    """
+    deadline = time.monotonic() + timeout
+    delay = interval
+    remaining = poll_func()
+
+    while remaining > 0:
+        wait = deadline - time.monotonic()
+        if wait <= 0:
+            return False
+
+        time.sleep(min(delay, wait))
+
+        previous = remaining
+        remaining = poll_func()
+        delay = interval if remaining < previous else min(delay * 2, max_interval)
+
+    return True
@@ -12,6 +12,7 @@ author: James Riach
 
 import urllib.parse
 from enum import Enum
+from ansible.module_utils.connection import ConnectionError
 try:
     import morpheus_funcs as mf
 except ModuleNotFoundError:
@@ -101,9 +102,32 @@ class ApiPath(Enum):
     }
 
 
+DEFAULT_WORKERS = 4
+
+# Instance actions that can be performed on multiple instances with a single request
+BULK_INSTANCE_ACTIONS = ['start', 'stop', 'restart']
+
+# Maximum number of ids in each list request filtered by id
+ID_FILTER_BATCH_SIZE = 100
+
+# Number of requests per worker sent to the connection in each call to send_requests,
+# keeping each call short enough to complete within the persistent command timeout
+REQUESTS_PER_WORKER = 8
+
+
 class MorpheusApi():
-    def __init__(self, connection) -> None:
+    def __init__(self, connection, page_size: int = None, workers: int = DEFAULT_WORKERS) -> None:
         self.connection = connection
+        self._page_size = page_size
+        self.workers = workers
+
+    @property
+    def page_size(self) -> int:
+        # Unless given, the page size is the connection's morpheus_page_size option,
+        # only requested from the connection once a list is requested
+        if self._page_size is None:
+            self._page_size = self.connection.get_page_size()
+        return self._page_size
 
     def _build_url(self, path: str, params: list[tuple] = None):
         url_parts = list(urllib.parse.urlparse(path))
@@ -120,6 +144,16 @@ class MorpheusApi():
 
         return self.connection.send_request(path=path)
 
+    def _get_list(self, api_path: str, api_params: dict, list_key: str, fields: list = None):
+        items = []
+
+        for page in self._get_pages(api_path, api_params, list_key, fields):
+            if not isinstance(page, list):
+                return page
+            items.extend(page)
+
+        return items
+
     def _get_object_by_id(self, api_path: str, obj_id: int, url_params: dict = None):
         path = '{0}/{1}'.format(api_path, obj_id)
 
@@ -129,6 +163,144 @@ class MorpheusApi():
 
         return self.connection.send_request(path=path)
 
+    def _get_pages(self, api_path: str, api_params: dict, list_key: str, fields: list = None):
+        """Generator that iterates through a list endpoint one page at a time, using the
+        total reported in the response meta to determine when the last page has been reached.
+        When more than one worker is configured, the remaining pages are planned from the first
+        page and requested concurrently, while still being yielded in server order. Without a
+        total, pages are requested one at a time until a short or empty page is returned.
+
+        Args:
+            api_path (str): The path of the list endpoint.
+            api_params (dict): API Parameters to filter the list.
+            list_key (str): The response key containing the list of items.
+            fields (list, optional): Keys of each item to retain, in the format used by dict_filter,
+             the remaining keys are stripped by the connection before the page is returned. Defaults to None.
+
+        Yields:
+            list | dict: The list of items in each page, or the response contents if the
+            response did not contain a list of items, e.g. an error response.
+        """
+        params = mf.dict_keys_to_camel_case(api_params)
+
+        if self.page_size < 1:
+            params['max'] = -1
+            response = self.connection.send_request(**self._page_request(api_path, params, list_key, fields))
+            yield self._return_reponse_key(response, list_key)
+            return
+
+        params['max'] = self.page_size
+        params['offset'] = params['offset'] if params.get('offset') is not None else 0
+
+        response = self.connection.send_request(**self._page_request(api_path, params, list_key, fields))
+        page = self._return_reponse_key(response, list_key)
+        yield page
+
+        if not isinstance(page, list) or len(page) == 0:
+            return
+
+        # The appliance may return fewer items than requested per page, later pages are
+        # planned with the number of items it actually returned
+        step = min(len(page), self.page_size)
+
+        try:
+            total = int(response['contents']['meta']['total'])
+        except (KeyError, TypeError, ValueError):
+            total = None
+
+        if total is None:
+            offset = params['offset']
+            while len(page) >= step:
+                offset += len(page)
+                response = self.connection.send_request(
+                    **self._page_request(api_path, {**params, 'offset': offset}, list_key, fields)
+                )
+                page = self._return_reponse_key(response, list_key)
+                yield page
+
+                if not isinstance(page, list) or len(page) == 0:
+                    return
+            return
+
+        offsets = list(range(params['offset'] + len(page), total, step))
+
+        if self.workers is not None and self.workers > 1:
+            # Request at most one page per worker at a time so memory use stays bounded
+            for idx in range(0, len(offsets), self.workers):
+                requests = [
+                    self._page_request(api_path, {**params, 'offset': offset}, list_key, fields)
+                    for offset in offsets[idx:idx + self.workers]
+                ]
+                for response in self.send_requests(requests):
+                    page = self._return_reponse_key(response, list_key)
+                    yield page
+
+                    if not isinstance(page, list):
+                        return
+            return
+
+        for offset in offsets:
+            params['offset'] = offset
+            response = self.connection.send_request(**self._page_request(api_path, params, list_key, fields))
+            page = self._return_reponse_key(response, list_key)
+            yield page
+
+            if not isinstance(page, list) or len(page) == 0:
+                return
+
+    def _get_by_name(self, path: ApiPath, name: str) -> list:
+        """Get the objects of a list endpoint with a matching name, using the connection's
+        index of objects by name when it is enabled. Names not found in the index are
+        looked up on the appliance, as the object may have been created elsewhere.
+
+        Args:
+            path (ApiPath): The list endpoint.
+            name (str): The name of the objects.
+
+        Returns:
+            list: The matching objects, or the response contents if the request failed.
+        """
+        api_path = path.value['path']
+        index = self.connection.get_by_name(api_path, path.value['list'], name)
+
+        if index['items']:
+            return index['items']
+
+        items = self._get_list(api_path, {'name': name}, path.value['list'])
+
+        if index['enabled'] and isinstance(items, list):
+            for item in items:
+                if item.get('id') is not None:
+                    self.connection.update_name_index(api_path, item['id'], item)
+
+        return items
+
+    def _indexed_path(self, path: ApiPath, path_extension: str = None) -> bool:
+        return path_extension is None and 'list' in path.value and '{' not in path.value['path']
+
+    def _update_name_index(self, path: ApiPath, response: dict):
+        if response.get('code') != 200:
+            return
+
+        contents = response.get('contents')
+        item = contents.get(path.value['dict']) if isinstance(contents, dict) else None
+
+        if isinstance(item, dict) and item.get('id') is not None and item.get('name') is not None:
+            self.connection.update_name_index(path.value['path'], item['id'], item)
+            return
+
+        # The response does not say what changed, so the index has to be rebuilt
+        self.connection.invalidate_name_index(path.value['path'])
+
+    def _page_request(self, api_path: str, params: dict, list_key: str, fields: list = None) -> dict:
+        request = {'path': self._build_url(api_path, self._url_params(params))}
+
+        if fields is not None:
+            request['fields'] = list(fields)
+            request['fields_key'] = list_key
+
+        return request
+
     def _payload_from_params(self, params: dict):
         payload = mf.dict_keys_to_camel_case(
             {k: v for k, v in params.items() if v is not None}
@@ -181,8 +353,68 @@ class MorpheusApi():
             path=path,
             method='POST'
         )
+        self._update_name_index(ApiPath.KEY_PAIR_PATH, response)
+
         return self._return_reponse_key(response, '')
 
+    def bulk_instance_action(self, action: str, item_ids: list, batch_size: int = 50) -> list:
+        """Perform an action on multiple Instances using the bulk action endpoint, with up to batch_size
+        Instances in each request. Batches are sent concurrently when more than one worker is configured.
+        Should the appliance not have the bulk action endpoint, the action is performed on each Instance individually.
+
+        Args:
+            action (str): The action to perform, one of BULK_INSTANCE_ACTIONS.
+            item_ids (list): The ids of the Instances.
+            batch_size (int, optional): Maximum number of Instances in each request. Defaults to 50.
+
+        Returns:
+            list: The result of the action for each Instance, in the same format and order as instance_actions.
+        """
+        if action not in BULK_INSTANCE_ACTIONS:
+            raise ValueError('Bulk action not supported: {0}'.format(action))
+
+        path = '{0}/{1}'.format(ApiPath.INSTANCES_PATH.value['path'], action)
+        batches = [item_ids[idx:idx + batch_size] for idx in range(0, len(item_ids), max(1, batch_size))]
+
+        responses = self.send_requests([
+            {'path': self._build_url(path, self._url_params({'ids': batch})), 'method': 'PUT'}
+            for batch in batches
+        ])
+
+        # Appliances without the bulk action endpoint respond with a 404 or 405,
+        # the Instances of those batches have the action performed individually
+        unsupported = [
+            item_id
+            for batch, response in zip(batches, responses)
+            if response.get('code') in [404, 405]
+            for item_id in batch
+        ]
+        fallback = iter(self.instance_actions(action, unsupported)) if len(unsupported) > 0 else None
+
+        results = []
+        for batch, response in zip(batches, responses):
+            if response.get('code') in [404, 405]:
+                results.extend(next(fallback) for item_id in batch)
+                continue
+
+            contents = self._return_reponse_key(response, '')
+            if not isinstance(contents, dict):
+                contents = {}
+
+            instance_results = contents.get('results') if isinstance(contents.get('results'), dict) else {}
+            batch_result = {
+                'success': contents.get('success', False),
+                'msg': contents.get('msg', '')
+            }
+
+            # Report the result of each Instance where given, otherwise the result of the batch
+            results.extend(
+                {str(item_id): instance_results.get(str(item_id), batch_result)}
+                for item_id in batch
+            )
+
+        return results
+
     def common_create(self, path: ApiPath, api_params: dict, path_extension: str = None, raw: bool = False):
         api_path = '{0}/{1}'.format(path.value['path'], path_extension) if path_extension is not None else path.value['path']
 
@@ -194,24 +426,52 @@ class MorpheusApi():
             path=api_path,
             method='POST'
         )
+        if self._indexed_path(path, path_extension):
+            self._update_name_index(path, response)
+
         return self._return_reponse_key(response, path.value['dict']) \
             if not raw else self._return_reponse_key(response, '')
 
-    def common_delete(self, path: ApiPath, item_id: int | str, api_params: dict = None):
-        path = '{0}/{1}'.format(path.value['path'], item_id)
+    def _delete_request(self, path: ApiPath, item_id: int | str, api_params: dict = None) -> dict:
+        api_path = '{0}/{1}'.format(path.value['path'], item_id)
 
         if api_params is not None:
             params = mf.dict_keys_to_camel_case(api_params)
             url_params = self._url_params(params)
-            path = self._build_url(path, url_params)
+            api_path = self._build_url(api_path, url_params)
+
+        return {'path': api_path, 'method': 'DELETE'}
+
+    def common_delete(self, path: ApiPath, item_id: int | str, api_params: dict = None):
+        response = self.connection.send_request(**self._delete_request(path, item_id, api_params))
+
+        if self._indexed_path(path) and response.get('code') == 200:
+            if isinstance(item_id, int):
+                self.connection.update_name_index(path.value['path'], item_id)
+            else:
+                self.connection.invalidate_name_index(path.value['path'])
 
-        response = self.connection.send_request(
-            path=path,
-            method='DELETE'
-        )
         return self._return_reponse_key(response, '')
 
-    def common_get(self, path: ApiPath, api_params: dict, path_extension: str = None, raw: bool = False):
+    def common_delete_many(self, path: ApiPath, item_ids: list, api_params: dict = None) -> list:
+        """Delete multiple items, concurrently when more than one worker is configured.
+
+        Args:
+            path (ApiPath): The endpoint of the items.
+            item_ids (list): The ids of the items to delete.
+            api_params (dict, optional): API Parameters applied to each deletion. Defaults to None.
+
+        Returns:
+            list: The response to each deletion, in the same order as item_ids.
+        """
+        responses = self.send_requests([self._delete_request(path, item_id, api_params) for item_id in item_ids])
+
+        if self._indexed_path(path) and any(response.get('code') == 200 for response in responses):
+            self.connection.invalidate_name_index(path.value['path'])
+
+        return [self._return_reponse_key(response, '') for response in responses]
+
+    def common_get(self, path: ApiPath, api_params: dict, path_extension: str = None, raw: bool = False, fields: list = None):
         api_path = '{0}/{1}'.format(path.value['path'], path_extension) if path_extension is not None else path.value['path']
 
         if 'id' in api_params and api_params['id'] is not None:
@@ -219,9 +479,15 @@ class MorpheusApi():
             return self._return_reponse_key(response, path.value['dict']) \
                 if not raw else self._return_reponse_key(response, '')
 
-        response = self._get_object(api_path, api_params, True)
-        return self._return_reponse_key(response, path.value['list']) \
-            if not raw else self._return_reponse_key(response, '')
+        if raw:
+            response = self._get_object(api_path, api_params, True)
+            return self._return_reponse_key(response, '')
+
+        if self._indexed_path(path, path_extension) and api_params.get('name') is not None \
+                and all(v is None for k, v in api_params.items() if k not in ['id', 'name']):
+            return self._get_by_name(path, api_params['name'])
+
+        return self._get_list(api_path, api_params, path.value['list'], fields)
 
     def common_set(self, path: ApiPath, item_id: int, api_params: dict, raw: bool = False):
         api_path = '{0}/{1}'.format(path.value['path'], item_id)
@@ -234,12 +500,18 @@ class MorpheusApi():
             path=api_path,
             method='PUT'
         )
+        if self._indexed_path(path):
+            self._update_name_index(path, response)
+
         return self._return_reponse_key(response, path.value['dict']) \
             if not raw else self._return_reponse_key(response, '')
 
-    def delete_all_instance_snapshots(self, instance_id: int):
+    def _delete_all_instance_snapshots_request(self, instance_id: int) -> dict:
         path = '{0}/{1}/delete-all-snapshots'.format(ApiPath.INSTANCES_PATH.value['path'], instance_id)
-        response = self.connection.send_request(path=path, method='DELETE')
+        return {'path': path, 'method': 'DELETE'}
+
+    def delete_all_instance_snapshots(self, instance_id: int):
+        response = self.connection.send_request(**self._delete_all_instance_snapshots_request(instance_id))
         return self._return_reponse_key(response, '')
 
     def delete_virtual_image_file(self, api_params: dict):
@@ -264,74 +536,139 @@ class MorpheusApi():
         response = self.connection.send_request(path=ApiPath.APPLIANCE_SETTINGS_PATH.value['path'])
         return self._return_reponse_key(response, 'applianceSettings')
 
-    def get_cloud_datastores(self, api_params: dict):
+    def get_cloud_datastores(self, api_params: dict, fields: list = None):
         zone_id = api_params.pop('zone_id')
 
         if api_params['id'] is not None:
             response = self._get_object_by_id(ApiPath.CLOUD_DATASTORES.value['path'].format(zone_id), api_params['id'])
             return self._return_reponse_key(response, 'datastore')
 
-        response = self._get_object(ApiPath.CLOUD_DATASTORES.value['path'].format(zone_id), api_params, True)
-        return self._return_reponse_key(response, 'datastores')
+        return self._get_list(ApiPath.CLOUD_DATASTORES.value['path'].format(zone_id), api_params, 'datastores', fields)
+
+    def _instance_request(self, instance_id: int, details: bool = False) -> dict:
+        path = '{0}/{1}'.format(ApiPath.INSTANCES_PATH.value['path'], instance_id)
+        params = self._url_params({
+            'details': str(details).lower()
+        })
 
-    def get_instances(self, api_params: dict):
+        return {'path': self._build_url(path, params)}
+
+    def get_instances(self, api_params: dict, fields: list = None):
         if api_params['id'] is not None:
-            path = '{0}/{1}'.format(ApiPath.INSTANCES_PATH.value['path'], api_params['id'])
-            try:
-                detail = str(api_params['details']).lower()
-            except KeyError:
-                detail = 'false'
-            params = self._url_params({
-                'details': detail
-            })
-            path = self._build_url(path, params)
-            response = self.connection.send_request(path=path)
+            response = self.connection.send_request(
+                **self._instance_request(api_params['id'], api_params.get('details', False))
+            )
             return self._return_reponse_key(response, 'instance')
 
-        params = mf.dict_keys_to_camel_case(api_params)
-        params['max'] = -1
-        url_params = self._url_params(params)
+        return self._get_list(ApiPath.INSTANCES_PATH.value['path'], api_params, 'instances', fields)
+
+    def get_instances_by_id(self, instance_ids: list, details: bool = False) -> list:
+        """Get multiple Instances by id, concurrently when more than one worker is configured.
 
-        path = self._build_url(ApiPath.INSTANCES_PATH.value['path'], url_params)
+        Args:
+            instance_ids (list): The ids of the Instances.
+            details (bool, optional): Request extra details of each Instance. Defaults to False.
 
-        response = self.connection.send_request(path=path)
-        return self._return_reponse_key(response, 'instances')
+        Returns:
+            list: Each Instance, or the response contents should the request fail, in the same order as instance_ids.
+        """
+        responses = self.send_requests([self._instance_request(instance_id, details) for instance_id in instance_ids])
+
+        return [self._return_reponse_key(response, 'instance') for response in responses]
+
+    def list_instances_by_id(self, instance_ids: list, fields: list = None) -> list:
+        """Get multiple Instances using list requests filtered by id, with up to ID_FILTER_BATCH_SIZE
+        Instances in each request. Requests are sent concurrently when more than one worker is configured.
+
+        Args:
+            instance_ids (list): The ids of the Instances.
+            fields (list, optional): Keys of each Instance to retain, in the format used by dict_filter. Defaults to None.
+
+        Returns:
+            list: The Instances that exist, or the response contents should a request fail.
+        """
+        api_path = ApiPath.INSTANCES_PATH.value['path']
+        batches = [instance_ids[idx:idx + ID_FILTER_BATCH_SIZE] for idx in range(0, len(instance_ids), ID_FILTER_BATCH_SIZE)]
+
+        responses = self.send_requests([
+            self._page_request(api_path, {'id': batch, 'max': len(batch), 'offset': 0}, 'instances', fields)
+            for batch in batches
+        ])
+
+        wanted = set(instance_ids)
+        instances = []
+        for response in responses:
+            page = self._return_reponse_key(response, 'instances')
+            if not isinstance(page, list):
+                return page
+            instances.extend(instance for instance in page if instance.get('id') in wanted)
+
+        return instances
+
+    def _instance_snapshots_request(self, instance_id: int) -> dict:
+        return {'path': '{0}/{1}/snapshots'.format(ApiPath.INSTANCES_PATH.value['path'], instance_id)}
 
     def get_instance_snapshots(self, instance_id: int):
-        path = '{0}/{1}/snapshots'.format(ApiPath.INSTANCES_PATH.value['path'], instance_id)
-        response = self.connection.send_request(path=path)
+        response = self.connection.send_request(**self._instance_snapshots_request(instance_id))
         return self._return_reponse_key(response, 'snapshots')
 
-    def get_integrations(self, api_params: dict):
+    def get_instances_snapshots(self, instance_ids: list) -> list:
+        """Get the Snapshots of multiple Instances, concurrently when more than one worker is configured.
+        A failed request does not prevent the Snapshots of other Instances being returned.
+
+        Args:
+            instance_ids (list): The ids of the Instances.
+
+        Returns:
+            list: The Snapshots of each Instance, or the response contents should the request fail,
+            in the same order as instance_ids.
+        """
+        responses = self.send_requests(
+            [self._instance_snapshots_request(instance_id) for instance_id in instance_ids],
+            isolate_errors=True
+        )
+
+        return [self._return_reponse_key(response, 'snapshots') for response in responses]
+
+    def get_integrations(self, api_params: dict, fields: list = None):
         if api_params['id'] is not None:
             response = self._get_object_by_id(ApiPath.INTEGRATIONS_PATH.value['path'], api_params['id'])
             return self._return_reponse_key(response, 'integration')
 
-        # max = -1 doesnt' seem to work on this endpoint
-        api_params['max'] = 10000
-        response = self._get_object(ApiPath.INTEGRATIONS_PATH.value['path'], api_params)
-        return self._return_reponse_key(response, 'integrations')
+        # max = -1 doesnt' seem to work on this endpoint, so always page through the results
+        return self._get_list(ApiPath.INTEGRATIONS_PATH.value['path'], api_params, 'integrations', fields)
 
-    def get_virtual_images(self, api_params: dict):
+    def get_virtual_images(self, api_params: dict, fields: list = None):
         params = mf.dict_keys_to_camel_case(api_params)
-        params['max'] = -1
 
         if params['virtualImageId'] is not None:
             path = '{0}/{1}'.format(ApiPath.VIRTUAL_IMAGES_PATH.value['path'], params['virtualImageId'])
             response = self.connection.send_request(path=path)
             return self._return_reponse_key(response, 'virtualImage')
 
-        url_params = self._url_params(params)
-        path = self._build_url(ApiPath.VIRTUAL_IMAGES_PATH.value['path'], url_params)
+        return self._get_list(ApiPath.VIRTUAL_IMAGES_PATH.value['path'], params, 'virtualImages', fields)
 
-        response = self.connection.send_request(path=path)
-        return self._return_reponse_key(response, 'virtualImages')
+    def _instance_action_request(self, action: str, item_id: int) -> dict:
+        path = '{0}/{1}/{2}'.format(ApiPath.INSTANCES_PATH.value['path'], item_id, action)
+        return {'path': path, 'method': 'PUT'}
 
     def instance_action(self, action: str, item_id: int):
-        path = '{0}/{1}/{2}'.format(ApiPath.INSTANCES_PATH.value['path'], item_id, action)
-        response = self.connection.send_request(path=path, method='PUT')
+        response = self.connection.send_request(**self._instance_action_request(action, item_id))
         return self._return_reponse_key(response, '' if action in ['lock', 'unlock'] else 'results')
 
+    def instance_actions(self, action: str, item_ids: list) -> list:
+        """Perform an action on multiple Instances, concurrently when more than one worker is configured.
+
+        Args:
+            action (str): The action to perform, e.g. start, stop.
+            item_ids (list): The ids of the Instances.
+
+        Returns:
+            list: The response to each action, in the same order as item_ids.
+        """
+        responses = self.send_requests([self._instance_action_request(action, item_id) for item_id in item_ids])
+        return [self._return_reponse_key(response, '' if action in ['lock', 'unlock'] else 'results') for response in responses]
+
     def refresh_cloud(self, api_params: dict):
         path = '{0}/{1}/refresh'.format(ApiPath.CLOUDS.value['path'], api_params.pop('id'))
         body = self._payload_from_params(api_params)
@@ -344,6 +681,43 @@ class MorpheusApi():
 
         return self._return_reponse_key(response, '')
 
+    def send_requests(self, requests: list[dict], isolate_errors: bool = False) -> list[dict]:
+        """Send multiple requests, concurrently when more than one worker is configured.
+
+        Args:
+            requests (list[dict]): List of requests, each a dictionary of send_request arguments.
+            isolate_errors (bool, optional): Return a failure response for a request that raises an error,
+             instead of raising the error. Defaults to False.
+
+        Returns:
+            list[dict]: List of responses, in the same order as the requests.
+        """
+        if self.workers is not None and self.workers > 1 and len(requests) > 1:
+            responses = []
+            batch_size = self.workers * REQUESTS_PER_WORKER
+
+            for idx in range(0, len(requests), batch_size):
+                responses.extend(
+                    self.connection.send_requests(
+                        requests=requests[idx:idx + batch_size],
+                        workers=self.workers,
+                        isolate_errors=isolate_errors
+                    )
+                )
+
+            return responses
+
+        responses = []
+        for request in requests:
+            try:
+                responses.append(self.connection.send_request(**request))
+            except ConnectionError as exc:
+                if not isolate_errors:
+                    raise
+                responses.append({'code': None, 'contents': {'success': False, 'msg': str(exc)}, 'path': request.get('path')})
+
+        return responses
+
     def set_appliance_maintenance_mode(self, enabled: bool):
         params = self._url_params({'enabled': enabled})
         path = self._build_url(ApiPath.MAINTENANCE_MODE_PATH.value['path'], params)
@@ -374,22 +748,24 @@ class MorpheusApi():
 
         return self._return_reponse_key(response, 'datastore')
 
-    def snapshot_instance(self, api_params: dict):
+    def _snapshot_instance_request(self, api_params: dict) -> dict:
+        api_params = api_params.copy()
         path = '{0}/{1}/snapshot'.format(ApiPath.INSTANCES_PATH.value['path'], api_params.pop('id'))
         payload = self._payload_from_params(api_params)
-        body = {'snapshot': payload}
 
-        response = self.connection.send_request(
-            data=body,
-            path=path,
-            method='PUT'
-        )
+        return {'data': {'snapshot': payload}, 'path': path, 'method': 'PUT'}
+
+    def snapshot_instance(self, api_params: dict):
+        response = self.connection.send_request(**self._snapshot_instance_request(api_params))
 
         return self._return_reponse_key(response, '')
 
-    def snapshot_revert(self, instance_id: int, snapshot_id: int):
+    def _snapshot_revert_request(self, instance_id: int, snapshot_id: int) -> dict:
         path = '{0}/{1}/revert-snapshot/{2}'.format(ApiPath.INSTANCES_PATH.value['path'], instance_id, snapshot_id)
-        response = self.connection.send_request(path=path, method='PUT')
+        return {'path': path, 'method': 'PUT'}
+
+    def snapshot_revert(self, instance_id: int, snapshot_id: int):
+        response = self.connection.send_request(**self._snapshot_revert_request(instance_id, snapshot_id))
         return self._return_reponse_key(response, '')
 
     def update_cloud_logo(self, api_params: dict):
@@ -442,12 +818,20 @@ class MorpheusApi():
 
         response = {}
 
-        if payload['url'] is not None:
-            url_params = self._url_params(api_params)
+        if payload.get('url') is not None:
+            url_params = self._url_params({'filename': payload['filename'], 'url': payload['url']})
             path = self._build_url(path, url_params)
             response = self.connection.send_request(
                 path=path,
                 method='POST'
             )
 
+        if payload.get('filePath') is not None:
+            url_params = self._url_params({'filename': payload['filename']})
+            path = self._build_url(path, url_params)
+            response = self.connection.upload_file(
+                uri_path=path,
+                file_path=payload['filePath']
+            )
+
         return self._return_reponse_key(response, '')
@@ -150,7 +150,7 @@ def run_module():
 
     api_params = info_module.param_filter(module, ['active', 'visibility'])
 
-    response = morpheus_api.get_cloud_datastores(api_params)
+    response = morpheus_api.get_cloud_datastores(api_params, fields=info_module.response_fields(module, API_FILTER_KEYS))
 
     response = info_module.response_filter(module, response, API_FILTER_KEYS)
 
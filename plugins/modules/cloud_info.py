@@ -148,7 +148,7 @@ def run_module():
 
     api_params = info_module.param_filter(module)
 
-    response = morpheus_api.common_get(ApiPath.CLOUDS, api_params)
+    response = morpheus_api.common_get(ApiPath.CLOUDS, api_params, fields=info_module.response_fields(module, API_FILTER_KEYS))
 
     response = info_module.response_filter(module, response, API_FILTER_KEYS)
 
@@ -38,6 +38,37 @@ options:
             - eject
         required: true
         type: str
+    batch_size:
+        description:
+            - When O(match_name=all) and more than one instance matches, the number of instances started,
+              stopped or restarted by each request to the appliance.
+            - Set to V(1) to send a separate request for each instance. A separate request is also sent for each
+              instance when the appliance does not support starting, stopping or restarting multiple instances at once.
+        default: 50
+        type: int
+        version_added: 0.8.0
+    wait:
+        description:
+            - Wait for the instances to reach the requested state before returning.
+            - When O(state=restarted), instances are only considered restarted once they have been seen in
+              another status, or have been updated since the restart was requested, and are running again.
+            - Has no effect when O(state=backup) or O(state=eject).
+        default: false
+        type: bool
+        version_added: 0.8.0
+    wait_timeout:
+        description:
+            - Maximum number of seconds to wait for the instances to reach the requested state when O(wait=true).
+        default: 600
+        type: int
+        version_added: 0.8.0
+    parallelism:
+        description:
+            - Maximum number of instances to perform the action on, and read the state of, at the same time.
+            - The connection sends no more than 16 requests at the same time, regardless of this option.
+        default: 4
+        type: int
+        version_added: 0.8.0
     remove_options:
         description:
             - When O(state=absent) specify additional removal options.
@@ -109,6 +140,21 @@ EXAMPLES = r'''
     regex_name: true
     match_name: all
     state: backup
+
+- name: Start an instance and wait for it to be running
+  morpheus.core.instance:
+    name: PRODWEBSVR001
+    state: running
+    wait: true
+    wait_timeout: 300
+
+- name: Stop all development instances, eight at a time
+  morpheus.core.instance:
+    name: ^DEV.*$
+    regex_name: true
+    match_name: all
+    parallelism: 8
+    state: stopped
 '''
 
 RETURN = r'''
@@ -134,10 +180,10 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.connection import Connection
 try:
     import module_utils.morpheus_funcs as mf
-    from module_utils.morpheusapi import ApiPath, MorpheusApi
+    from module_utils.morpheusapi import ApiPath, MorpheusApi, BULK_INSTANCE_ACTIONS
 except ModuleNotFoundError:
     import ansible_collections.morpheus.core.plugins.module_utils.morpheus_funcs as mf
-    from ansible_collections.morpheus.core.plugins.module_utils.morpheusapi import ApiPath, MorpheusApi
+    from ansible_collections.morpheus.core.plugins.module_utils.morpheusapi import ApiPath, MorpheusApi, BULK_INSTANCE_ACTIONS
 
 
 INSTANCE_INFO_KEYS = (
@@ -148,14 +194,98 @@ INSTANCE_INFO_KEYS = (
 )
 
 
-def instance_state(morpheus_api: MorpheusApi, instance_id: int) -> dict:
-    response = morpheus_api.get_instances(
-        {
-            'id': instance_id
-        }
-    )
+# The key and value each instance is waited for, by module state, instances being
+# removed are waited for until they no longer exist
+TARGET_STATES = {
+    'absent': None,
+    'locked': ('locked', True),
+    'unlocked': ('locked', False),
+    'restarted': ('status', 'running'),
+    'running': ('status', 'running'),
+    'started': ('status', 'running'),
+    'stopped': ('status', 'stopped'),
+    'suspended': ('status', 'suspended')
+}
+
+FAILED_STATUSES = ['failed']
+
+# Restarted instances are still running straight after the request, so are only waited
+# for once they have been seen in another status, or have been updated since the request
+RESTART_STATES = ['restarted']
+
+
+def instance_state(morpheus_api: MorpheusApi, instance_ids: list) -> list:
+    responses = morpheus_api.get_instances_by_id(instance_ids)
+
+    return [mf.dict_filter(response, INSTANCE_INFO_KEYS) for response in responses]
+
+
+def instance_last_updated(morpheus_api: MorpheusApi, instance_ids: list) -> dict:
+    response = morpheus_api.list_instances_by_id(instance_ids, ['id', 'lastUpdated'])
+
+    if not isinstance(response, list):
+        return {}
+
+    return {instance['id']: instance.get('lastUpdated') for instance in response}
+
 
-    return mf.dict_filter(response, INSTANCE_INFO_KEYS)
+def wait_for_state(module_params: dict, morpheus_api: MorpheusApi, instances: list, last_updated: dict = None) -> tuple:
+    """Wait for instances to reach the state requested by the module parameters, checking the
+    state of every instance still being waited for with list requests filtered by id.
+
+    Args:
+        module_params (dict): The module parameters.
+        morpheus_api (MorpheusApi): An instantiated MorpheusApi Class.
+        instances (list): The instances to wait for.
+        last_updated (dict, optional): When each instance was last updated by id, before the action
+         was requested, used to tell when restarted instances have restarted. Defaults to None.
+
+    Returns:
+        tuple: (bool, dict) Whether every instance reached the requested state, and the
+        last known state of each instance by id.
+    """
+    target = TARGET_STATES[module_params['state']]
+    latest = {instance['id']: instance for instance in instances}
+    pending = set(latest)
+    failed = set()
+    restarting = module_params['state'] in RESTART_STATES
+    restarted = set()
+    last_updated = last_updated if last_updated is not None else {}
+
+    def poll() -> int:
+        response = morpheus_api.list_instances_by_id(sorted(pending), INSTANCE_INFO_KEYS + ('lastUpdated',))
+        if not isinstance(response, list):
+            return len(pending)
+
+        found = {instance['id']: instance for instance in response}
+
+        for instance_id in list(pending):
+            if instance_id not in found:
+                if target is None:
+                    latest[instance_id] = dict(latest[instance_id], status='deleted')
+                    pending.discard(instance_id)
+                continue
+
+            instance = found[instance_id]
+            latest[instance_id] = mf.dict_filter(instance, INSTANCE_INFO_KEYS)
+
+            if restarting and (instance.get('status') != target[1] or
+                               instance.get('lastUpdated') != last_updated.get(instance_id, instance.get('lastUpdated'))):
+                restarted.add(instance_id)
+
+            if instance.get('status') in FAILED_STATUSES:
+                failed.add(instance_id)
+                pending.discard(instance_id)
+            elif restarting and instance_id not in restarted:
+                continue
+            elif target is not None and instance.get(target[0]) == target[1]:
+                pending.discard(instance_id)
+
+        return len(pending)
+
+    completed = mf.wait_for(poll, module_params['wait_timeout'])
+
+    return completed and len(failed) == 0, latest
 
 
 def module_to_api_params(params: dict) -> dict:
@@ -195,6 +325,10 @@ def run_module():
         'state': {'type': 'str',
                   'choices': ['running', 'started', 'stopped', 'restarted', 'suspended', 'locked', 'unlocked', 'backup', 'absent', 'eject'],
                   'required': True},
+        'wait': {'type': 'bool', 'default': False},
+        'wait_timeout': {'type': 'int', 'default': 600},
+        'batch_size': {'type': 'int', 'default': 50},
+        'parallelism': {'type': 'int', 'default': 4},
         'remove_options': {
             'type': 'dict',
             'apply_defaults': True,
@@ -231,44 +365,81 @@ def run_module():
         'instance_state': []
     }
 
+    if module.params['parallelism'] < 1:
+        module.fail_json(msg='parallelism must be at least 1')
+
+    if module.params['batch_size'] < 1:
+        module.fail_json(msg='batch_size must be at least 1')
+
     connection = Connection(module._socket_path)
-    morpheus_api = MorpheusApi(connection)
+    morpheus_api = MorpheusApi(connection, workers=module.params['parallelism'])
 
     instances = mf.instance_filter(morpheus_api, module.params, INSTANCE_INFO_KEYS)
 
     action_func = {
-        'absent': partial(morpheus_api.common_delete, path=ApiPath.INSTANCES_PATH, api_params=module_to_api_params(module.params)),
-        'backup': partial(morpheus_api.instance_action, action='backup'),
-        'eject': partial(morpheus_api.instance_action, action='eject'),
-        'locked': partial(morpheus_api.instance_action, action='lock'),
-        'restarted': partial(morpheus_api.instance_action, action='restart'),
-        'running': partial(morpheus_api.instance_action, action='start'),
-        'started': partial(morpheus_api.instance_action, action='start'),
-        'stopped': partial(morpheus_api.instance_action, action='stop'),
-        'suspended': partial(morpheus_api.instance_action, action='suspend'),
-        'unlocked': partial(morpheus_api.instance_action, action='unlock')
+        'absent': partial(morpheus_api.common_delete_many, path=ApiPath.INSTANCES_PATH, api_params=module_to_api_params(module.params)),
+        'backup': partial(morpheus_api.instance_actions, action='backup'),
+        'eject': partial(morpheus_api.instance_actions, action='eject'),
+        'locked': partial(morpheus_api.instance_actions, action='lock'),
+        'restarted': partial(morpheus_api.instance_actions, action='restart'),
+        'running': partial(morpheus_api.instance_actions, action='start'),
+        'started': partial(morpheus_api.instance_actions, action='start'),
+        'stopped': partial(morpheus_api.instance_actions, action='stop'),
+        'suspended': partial(morpheus_api.instance_actions, action='suspend'),
+        'unlocked': partial(morpheus_api.instance_actions, action='unlock')
     }.get(module.params['state'])
 
+    if module.params['match_name'] == 'all' and module.params['batch_size'] > 1 and len(instances) > 1 \
+            and action_func.keywords.get('action') in BULK_INSTANCE_ACTIONS:
+        action_func = partial(
+            morpheus_api.bulk_instance_action,
+            action=action_func.keywords['action'],
+            batch_size=module.params['batch_size']
+        )
+
+    fail_msg = 'One or more instances failed to complete the request'
+    succeeded = []
+
+    last_updated = None
+    if not module.check_mode and module.params['wait'] and module.params['state'] in RESTART_STATES:
+        last_updated = instance_last_updated(morpheus_api, [instance['id'] for instance in instances])
+
     if not module.check_mode:
-        results = [mf.dict_keys_to_snake_case(action_func(item_id=instance['id'])) for instance in instances]
+        results = [mf.dict_keys_to_snake_case(response) for response in action_func(item_ids=[instance['id'] for instance in instances])]
 
-        for response in results:
+        for instance, response in zip(instances, results):
             success, msg = mf.success_response(response[list(response.keys())[0]]) \
                 if module.params['state'] not in ['absent', 'locked', 'unlocked'] \
                 else mf.success_response(response)
             result['changed'] = success if not result['changed'] else False
             result['failed'] = not success if not result['failed'] else False
+
+            if success:
+                succeeded.append(instance)
     else:
         result['changed'] = True
 
-    result['instance_state'] = [
-        instance_state(morpheus_api, inst['id']) for inst in instances
-    ] if not module.check_mode else [
-        parse_check_mode(
-            module_params=module.params,
-            instance=inst
-        ) for inst in deepcopy(instances)
-    ]
+    if not module.check_mode and module.params['wait'] and module.params['state'] in TARGET_STATES:
+        # Only wait for instances the action was successfully requested for
+        reached, latest = wait_for_state(module.params, morpheus_api, succeeded, last_updated)
+
+        other_ids = [inst['id'] for inst in instances if inst['id'] not in latest]
+        latest.update(zip(other_ids, instance_state(morpheus_api, other_ids)))
+
+        result['instance_state'] = [latest[inst['id']] for inst in instances]
+
+        if not reached:
+            result['failed'] = True
+            fail_msg = 'One or more instances did not reach the requested state'
+    else:
+        result['instance_state'] = instance_state(
+            morpheus_api, [inst['id'] for inst in instances]
+        ) if not module.check_mode else [
+            parse_check_mode(
+                module_params=module.params,
+                instance=inst
+            ) for inst in deepcopy(instances)
+        ]
 
     if module._diff:
         result['diff'] = []
@@ -294,7 +465,7 @@ def run_module():
 
     if result['failed']:
         module.fail_json(
-            msg='One or more instances failed to complete the request',
+            msg=fail_msg,
             **result
         )
 
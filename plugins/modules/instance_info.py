@@ -261,7 +261,7 @@ def run_module():
     api_params['deleted'] = 'only' in module.params['deleted']
     api_params['all_labels'] = api_params.pop('labels') if module.params['match_all_labels'] else None
 
-    response = morpheus_api.get_instances(api_params)
+    response = morpheus_api.get_instances(api_params, fields=info_module.response_fields(module, API_FILTER_KEYS))
 
     response = info_module.response_filter(module, response, API_FILTER_KEYS)
 
@@ -53,6 +53,42 @@ options:
             - oldest
         default: latest
         type: str
+    retention:
+        description:
+            - When O(state=absent), remove every snapshot of the instance(s) not retained by this policy,
+              instead of a single snapshot.
+            - A snapshot is retained if any of O(retention.keep_last) or O(retention.keep_days) retains it.
+            - The snapshots of each instance are retrieved once, and all removals are performed together.
+        type: dict
+        version_added: 0.8.0
+        suboptions:
+            keep_last:
+                description:
+                    - Number of most recent snapshots to retain, must be 0 or greater.
+                type: int
+            keep_days:
+                description:
+                    - Retain snapshots created within this number of days, must be 0 or greater.
+                type: float
+            name_prefix:
+                description:
+                    - Only apply the policy to snapshots with a name starting with this prefix.
+                    - Snapshots with other names are always retained.
+                type: str
+    parallelism:
+        description:
+            - Maximum number of instances to retrieve the snapshots of, and perform snapshot actions against, at the same time.
+            - The connection sends no more than 16 requests at the same time, regardless of this option.
+        default: 4
+        type: int
+        version_added: 0.8.0
+    wait_timeout:
+        description:
+            - Maximum number of seconds to wait for the result of each action to be visible
+              in the snapshots of the instance, before reporting differences in diff mode.
+        default: 60
+        type: int
+        version_added: 0.8.0
 extends_documentation_fragment:
     - action_common_attributes
     - morpheus.core.instance_filter_base
@@ -93,6 +129,17 @@ EXAMPLES = r'''
     snapshot_id: 50
     state: absent
 
+- name: Keep the 7 most recent nightly snapshots, and any from the last 30 days, for all Instances
+  morpheus.core.instance_snapshot:
+    name: ^.*$
+    match_name: all
+    regex_name: true
+    state: absent
+    retention:
+      keep_last: 7
+      keep_days: 30
+      name_prefix: Nightly
+
 - name: Remove the Latest Snapshot matching Name for all Instances
   morpheus.core.instance_snapshot:
     name: ^.*$
@@ -126,7 +173,6 @@ snapshot_results:
 
 from copy import deepcopy
 from functools import partial
-from time import sleep
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.connection import Connection
 try:
@@ -139,20 +185,91 @@ except ModuleNotFoundError:
     from ansible_collections.morpheus.core.plugins.module_utils.morpheus_classes import InstanceSnapshots, SnapshotAction
 
 
-def exec_snapshot_actions(actions: list[SnapshotAction]) -> list[dict]:
+def exec_snapshot_actions(actions: list[SnapshotAction], morpheus_api: MorpheusApi) -> list[dict]:
     """Execute the Actions from a List of SnapshotAction objects
 
     Args:
         actions (list[SnapshotAction]): List of SnapshotAction Objects
+        morpheus_api (MorpheusApi): An instantiated MorpheusApi Class
 
     Returns:
         list[dict]: List of SnapshotAction Execution Dictionaries
     """
-    results = []
-    for action in actions:
-        results.append(action.execute())
+    return SnapshotAction.execute_all(actions, morpheus_api)
+
+
+def snapshot_change_visible(action: SnapshotAction, before: InstanceSnapshots, after: InstanceSnapshots) -> bool:
+    """Check whether the result of a SnapshotAction is visible in the snapshots of an instance.
+
+    Args:
+        action (SnapshotAction): The executed SnapshotAction.
+        before (InstanceSnapshots): The snapshots of the instance before the action was executed.
+        after (InstanceSnapshots): The current snapshots of the instance.
+
+    Returns:
+        bool: True if the result of the action is visible.
+    """
+    if action.action == 'create':
+        # snapshot_name is optional, so a new snapshot is identified by an id not seen before
+        before_ids = set(snapshot['id'] for snapshot in before.snapshots)
+        return any(
+            snapshot['id'] not in before_ids
+            and (action.snapshot_name is None or snapshot['name'] == action.snapshot_name)
+            for snapshot in after.snapshots
+        )
+
+    if action.action == 'remove':
+        return all(snapshot['id'] != action.snapshot_id for snapshot in after.snapshots)
+
+    if action.action == 'remove_all':
+        return after.snapshot_count == 0
+
+    return True
+
+
+def wait_for_snapshots(module_params: dict, morpheus_api: MorpheusApi, instance_snapshots: list[InstanceSnapshots],
+                       snapshot_actions: list[SnapshotAction]) -> tuple:
+    """Re-read the snapshots of each instance a successful action was executed against,
+    until the results of the actions are visible or the timeout expires.
+
+    Args:
+        module_params (dict): The module parameters.
+        morpheus_api (MorpheusApi): An instantiated MorpheusApi Class.
+        instance_snapshots (list[InstanceSnapshots]): The snapshots of each instance before the actions were executed.
+        snapshot_actions (list[SnapshotAction]): The executed SnapshotActions.
+
+    Returns:
+        tuple: (bool, list[InstanceSnapshots]) Whether all results are visible, and the current snapshots of each instance.
+    """
+    sort = module_params['snapshot_age'] == 'latest'
+    before = {inst_snapshot.instance_id: inst_snapshot for inst_snapshot in instance_snapshots}
+    latest = {}
+    pending = {}
+
+    for action in snapshot_actions:
+        if action.success and action.instance_id in before:
+            pending.setdefault(action.instance_id, []).append(action)
+
+    def poll() -> int:
+        # Instances whose snapshots could not be read are not included, so remain pending
+        current, _ = InstanceSnapshots.from_instances(
+            [{'id': instance_id, 'name': before[instance_id].instance_name} for instance_id in pending],
+            morpheus_api,
+            sort
+        )
+
+        for inst_snapshot in current:
+            latest[inst_snapshot.instance_id] = inst_snapshot
+
+            if all(snapshot_change_visible(action, before[inst_snapshot.instance_id], inst_snapshot)
+                   for action in pending[inst_snapshot.instance_id]):
+                del pending[inst_snapshot.instance_id]
+
+        return len(pending)
 
-    return results
+    visible = mf.wait_for(poll, module_params['wait_timeout'], interval=1.0)
+
+    return visible, [latest.get(inst_snapshot.instance_id, inst_snapshot) for inst_snapshot in instance_snapshots]
 
 
 def parse_check_mode(module_params: dict, instance_snapshot: InstanceSnapshots,
@@ -222,6 +339,29 @@ def snapshot_remove(module_params: dict, morpheus_api: MorpheusApi, instance_sna
         ]
 
 
+def snapshot_retention(module_params: dict, morpheus_api: MorpheusApi, instance_snapshots: list[InstanceSnapshots]) -> list[SnapshotAction]:
+    retention = module_params['retention']
+
+    return [
+        SnapshotAction(
+            morpheus_api=morpheus_api,
+            action='remove',
+            instance_id=instance.instance_id,
+            instance_name=instance.instance_name,
+            snapshot_id=snapshot['id'],
+            snapshot_name=snapshot['name'],
+            snapshot_date=snapshot['date_created'],
+            snapshot_description=snapshot['description']
+        )
+        for instance in instance_snapshots
+        for snapshot in instance.expired(
+            keep_last=retention['keep_last'],
+            keep_days=retention['keep_days'],
+            name_prefix=retention['name_prefix']
+        )
+    ]
+
+
 def snapshot_remove_all(morpheus_api: MorpheusApi, instances: list) -> list[SnapshotAction]:
     return [
         SnapshotAction(
@@ -288,7 +428,18 @@ def run_module():
         'snapshot_id': {'type': 'int'},
         'snapshot_name': {'type': 'str'},
         'snapshot_description': {'type': 'str'},
-        'snapshot_age': {'type': 'str', 'choices': ['latest', 'oldest'], 'default': 'latest'}
+        'snapshot_age': {'type': 'str', 'choices': ['latest', 'oldest'], 'default': 'latest'},
+        'retention': {
+            'type': 'dict',
+            'options': {
+                'keep_last': {'type': 'int'},
+                'keep_days': {'type': 'float'},
+                'name_prefix': {'type': 'str'}
+            },
+            'required_one_of': [('keep_last', 'keep_days')]
+        },
+        'parallelism': {'type': 'int', 'default': 4},
+        'wait_timeout': {'type': 'int', 'default': 60}
     }
 
     mutually_exclusive = [
@@ -296,7 +447,9 @@ def run_module():
         ('id', 'regex_name'),
         ('id', 'match_name'),
         ('snapshot_id', 'snapshot_name'),
-        ('snapshot_id', 'snapshot_description')
+        ('snapshot_id', 'snapshot_description'),
+        ('retention', 'snapshot_id'),
+        ('retention', 'snapshot_name')
     ]
 
     required_one_of = [
@@ -316,15 +469,40 @@ def run_module():
     )
 
     connection = Connection(module._socket_path)
-    morpheus_api = MorpheusApi(connection)
+    morpheus_api = MorpheusApi(connection, workers=module.params['parallelism'])
 
     # additional parameter validation
+    if module.params['parallelism'] < 1:
+        module.fail_json(
+            msg='parallelism must be at least 1',
+            **result
+        )
+
     if module.params['snapshot_id'] is not None and module.params['state'] not in ['absent', 'revert']:
         module.fail_json(
             msg='snapshot_id only valid when state is one of: absent, revert',
             **result
         )
 
+    if module.params['retention'] is not None and module.params['state'] != 'absent':
+        module.fail_json(
+            msg='retention only valid when state is: absent',
+            **result
+        )
+
+    if module.params['retention'] is not None and module.params['id'] is None and module.params['name'] is None:
+        module.fail_json(
+            msg='id or name required when using retention',
+            **result
+        )
+
+    if module.params['retention'] is not None and \
+            any(module.params['retention'][key] is not None and module.params['retention'][key] < 0 for key in ['keep_last', 'keep_days']):
+        module.fail_json(
+            msg='retention keep_last and keep_days must be 0 or greater',
+            **result
+        )
+
     if module.params['state'] == 'revert' and module.params['id'] is None and module.params['name'] is None:
         module.fail_json(
             msg='id or name required when state is: revert',
@@ -336,15 +514,19 @@ def run_module():
     if module.params['id'] is not None or module.params['name'] is not None:
         instances = mf.instance_filter(morpheus_api, module.params)
         sort = module.params['snapshot_age'] == 'latest'
-        instance_snapshots = [
-            InstanceSnapshots(instance['name'],
-                              instance['id'],
-                              morpheus_api,
-                              sort)
-            for instance in instances
-        ]
+        instance_snapshots, failures = InstanceSnapshots.from_instances(instances, morpheus_api, sort)
+
+        if len(failures) > 0:
+            module.fail_json(
+                msg='Failed to retrieve snapshots of {0}'.format(', '.join(
+                    '{0} ({1}): {2}'.format(failure['instance_name'], failure['instance_id'], failure['msg'])
+                    for failure in failures
+                )),
+                **result
+            )
+
         for inst_snapshot in instance_snapshots:
-            if module.params['state'] == 'absent':
+            if module.params['state'] == 'absent' and module.params['retention'] is None:
                 try:
                     inst_snapshot.snapshots = [inst_snapshot.snapshots[0]]
                 except IndexError:
@@ -355,6 +537,10 @@ def run_module():
             snapshot_remove,
             module_params=module.params,
             instance_snapshots=instance_snapshots
+        ) if module.params['retention'] is None else partial(
+            snapshot_retention,
+            module_params=module.params,
+            instance_snapshots=instance_snapshots
         ),
         'present': partial(
             snapshot_create,
@@ -374,7 +560,7 @@ def run_module():
 
     snapshot_actions = action_func(morpheus_api=morpheus_api)
 
-    result['snapshot_results'] = exec_snapshot_actions(snapshot_actions) \
+    result['snapshot_results'] = exec_snapshot_actions(snapshot_actions, morpheus_api) \
         if not module.check_mode else [mf.class_to_dict(action) for action in snapshot_actions]
 
     result['changed'] = any(action_result['success'] for action_result in result['snapshot_results']) \
@@ -382,7 +568,6 @@ def run_module():
 
     if module._diff:
         result['diff'] = []
-        sleep(3)  # Allow enough time for actions to fully execute
 
         if module.params['state'] == 'revert':
             prepared_actions = [
@@ -405,22 +590,26 @@ def run_module():
             })
 
         if instances is not None and module.params['state'] != 'revert':
-            updated_snapshots = [
-                InstanceSnapshots(instance['name'],
-                                  instance['id'],
-                                  morpheus_api,
-                                  sort)
-                for instance in instances
-            ] if not module.check_mode else [
-                parse_check_mode(
-                    module_params=module.params,
-                    instance_snapshot=inst_snapshot,
-                    action=snapshot_action
-                )
-                for inst_snapshot in deepcopy(instance_snapshots)
-                for snapshot_action in snapshot_actions
-                if inst_snapshot.instance_id == snapshot_action.instance_id
-            ]
+            if not module.check_mode:
+                visible, updated_snapshots = wait_for_snapshots(module.params, morpheus_api, instance_snapshots, snapshot_actions)
+
+                if not visible:
+                    module.warn('Timed out waiting for snapshot changes to be visible, the diff may be incomplete')
+            else:
+                # Apply every action against an instance to a single copy of its snapshots
+                updated_snapshots = []
+                for inst_snapshot in deepcopy(instance_snapshots):
+                    inst_actions = [action for action in snapshot_actions if action.instance_id == inst_snapshot.instance_id]
+
+                    for snapshot_action in inst_actions:
+                        parse_check_mode(
+                            module_params=module.params,
+                            instance_snapshot=inst_snapshot,
+                            action=snapshot_action
+                        )
+
+                    if len(inst_actions) > 0:
+                        updated_snapshots.append(inst_snapshot)
 
             for inst_snapshot in updated_snapshots:
                 before = mf.class_to_dict(
@@ -36,6 +36,18 @@ options:
         description:
             - URL of file to upload.
         type: str
+    file_path:
+        description:
+            - Path to a local file on the Ansible controller to upload.
+            - The file is streamed from disk, so files of any size can be uploaded.
+            - If O(filename) is not specified, the name of the local file is used.
+            - The whole upload is performed within a single command sent to the persistent connection, so the
+              C(ansible_command_timeout) variable must allow enough time for the file to be uploaded. The upload
+              fails as soon as it is clear it cannot finish within the timeout.
+            - The file is uploaded, and the module reports a change, every time the module is run.
+            - Only valid when O(state=present).
+        type: path
+        version_added: 0.8.0
     labels:
         description:
             - Provide a list of labels to apply to Virtual Image.
@@ -178,6 +190,14 @@ EXAMPLES = r'''
     filename: rhel8x64.ova
     file_url: https://my.domain.tld/rhel8x64.ova
 
+- name: Create Virtual Image and upload a local File
+  morpheus.core.virtual_image:
+    state: present
+    name: My QCOW2 Image
+    image_type: qcow2
+    os_type: ubuntu 22.04 64bit
+    file_path: /var/lib/images/ubuntu-22.04.qcow2
+
 - name: Remove Virtual Image by Name
   morpheus.core.virtual_image:
     state: absent
@@ -290,11 +310,12 @@ virtual_image:
         }
 '''
 
+import os
 from copy import deepcopy
 from hashlib import sha256
 from functools import partial
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.connection import Connection
+from ansible.module_utils.connection import Connection, ConnectionError
 
 try:
     import module_utils.morpheus_funcs as mf
@@ -379,7 +400,13 @@ def create_update_vi(module: AnsibleModule, morpheus_api: MorpheusApi) -> dict:
             'False': partial(morpheus_api.upload_virtual_image_file, api_params=file_params),
             'True': partial(parse_check_mode, state=module.params['state'], file_params=file_params, virtual_images=virtual_image)
         }.get(str(module.check_mode))
-        exec_upload_action = upload_action()
+        try:
+            exec_upload_action = upload_action()
+        except ConnectionError as e:
+            module.fail_json(
+                msg='Failed to upload file: {0}'.format(e),
+                virtual_image=vi_response
+            )
         upload_response = mf.success_response(exec_upload_action)[0]
 
     result = {
@@ -444,9 +471,13 @@ def module_to_api_params(module_params: dict) -> tuple:
     file_params = {
         'virtual_image_id': api_params['virtual_image_id'] if api_params['virtual_image_id'] is not None else 0,
         'filename': api_params.pop('filename'),
-        'url': api_params.pop('file_url')
+        'url': api_params.pop('file_url'),
+        'file_path': api_params.pop('file_path')
     }
 
+    if file_params['filename'] is None and file_params['file_path'] is not None:
+        file_params['filename'] = os.path.basename(file_params['file_path'])
+
     return api_params, file_params
 
 
@@ -570,6 +601,7 @@ def run_module():
         'name': {'type': 'str'},
         'filename': {'type': 'str'},
         'file_url': {'type': 'str'},
+        'file_path': {'type': 'path'},
         'labels': {'type': 'list', 'elements': 'str'},
         'image_type': {'type': 'str'},
         'storage_provider_id': {'type': 'int'},
@@ -612,11 +644,29 @@ def run_module():
         'virtual_image': {}
     }
 
+    mutually_exclusive = [
+        ('file_url', 'file_path')
+    ]
+
     module = AnsibleModule(
         argument_spec=argument_spec,
+        mutually_exclusive=mutually_exclusive,
         supports_check_mode=True
     )
 
+    if module.params['file_path'] is not None and module.params['state'] != 'present':
+        module.fail_json(
+            msg='file_path only valid when state is: present',
+            **result
+        )
+
+    if module.params['file_path'] is not None and \
+            (not os.path.isfile(module.params['file_path']) or not os.access(module.params['file_path'], os.R_OK)):
+        module.fail_json(
+            msg='file_path {0} is not a readable file'.format(module.params['file_path']),
+            **result
+        )
+
     connection = Connection(module._socket_path)
     morpheus_api = MorpheusApi(connection)
 